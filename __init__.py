@@ -4,11 +4,13 @@ del os
 __all__ = (
 	"Config",
 	"Lexer",
+	"FastLexer",
 	"Parser",
 	"TypeChecker",
 	"ErrorBin",
 	"ErrorExit",
 	"Place",
+	"TokenBuffer",
 	"Node",
 	"nodes",
 	"SemanticTokenType",
@@ -16,7 +18,7 @@ __all__ = (
 	"SemanticToken",
 	"TypeChecker",
 )
-from .compiler.lexer import Lexer
+from .compiler.lexer import Lexer, FastLexer
 from .compiler.parser import Parser
 from .compiler.type_checker import TypeChecker, SemanticTokenType, SemanticTokenModifier, SemanticToken
-from .compiler.primitives import Config, ErrorBin, ErrorExit, Place, Node, nodes
+from .compiler.primitives import Config, ErrorBin, ErrorExit, Place, TokenBuffer, Node, nodes
@@ -0,0 +1,198 @@
+#!/bin/env python3.10
+"""front-end compile time on generated programs: lexing, parsing, type checking and generating llvm ir, each on its own.
+programs are made of `modules` modules, that import each other, every module has `funs` functions with `depth` nested blocks,
+structs and enums with methods and long template strings, `scale` multiplies number of modules and functions.
+results are compared with the JSON baseline, if it exists, otherwise they are saved as one.
+does not need llvm.
+usage: benchmarks/compile.py [scale] [runs] [baseline.json]"""
+from dataclasses import dataclass, asdict
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+JARARACA_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+os.environ['JARARACA_PATH'] = JARARACA_PATH
+sys.path.insert(0, JARARACA_PATH)
+from compiler import TypeChecker, GenerateAssembly, extract_module_from_file_path
+from compiler.primitives import Config, ErrorBin, Passes, pack_directory, types, tune_gc
+PACKET = 'synthetic'
+PHASES = ('lex', 'parse', 'type check', 'generate')
+TOLERANCE = 1.25#slower than baseline by more than that is a regression
+
+@dataclass(slots=True, frozen=True)
+class Shape:
+	modules  :int = 8
+	funs     :int = 100#per module
+	structs  :int = 12#per module, and as many enums
+	depth    :int = 8#of nested blocks in every function
+	template :int = 16#parts of template strings
+	fanout   :int = 3#modules imported by every module
+	def scaled(self, scale:int) -> 'Shape':
+		return Shape(self.modules*scale, self.funs*scale, self.structs, self.depth, self.template, self.fanout)
+
+def nested(depth:int, indent:str, seed:int) -> str:
+	"""`depth` blocks inside each other, alternating if-elif-else and while"""
+	if depth == 0:
+		return f"{indent}acc = @acc + {seed}\n"
+	inner = nested(depth-1, indent+'\t', seed+1)
+	if depth % 2 == 0:
+		return f"""\
+{indent}if @acc > {seed*7} {{
+{indent}	acc = @acc - {seed}
+{inner}{indent}}} elif @acc < {seed} {{
+{indent}	acc = @acc * 2 + 1
+{indent}}} else {{
+{indent}	acc = @acc // 2
+{indent}}}
+"""
+	return f"""\
+{indent}limit{depth} = {seed}
+{indent}while @limit{depth} > 0 and @acc < {1000+seed} {{
+{indent}	limit{depth} = @limit{depth} - 1
+{inner}{indent}}}
+"""
+
+def module_text(idx:int, shape:Shape) -> str:
+	imported = range(max(0, idx-shape.fanout), idx)
+	lines = [f"from {PACKET}.m{i} import f{i}_0, S{i}_0, E{i}_0\n" for i in imported]
+	for k in range(shape.structs):
+		lines.append(f"""
+struct S{idx}_{k} {{
+	a:int
+	b:str
+	fun __init__(self:*S{idx}_{k}, a:int) {{
+		self.a = a
+		self.b = `s{k}-{{a}}`
+	}}
+	fun get(self:*S{idx}_{k}) -> int {{
+		return @self.a + len(@self.b) + {k}
+	}}
+}}
+enum E{idx}_{k} {{
+	NUMBER:int
+	TEXT:str
+	EMPTY
+	fun value(self:*E{idx}_{k}) -> int {{
+		match @self as v {{
+			NUMBER -> {{
+				return v
+			}}
+			TEXT -> {{
+				return len(v)
+			}}
+			default -> {{
+				return {k}
+			}}
+		}}
+	}}
+}}
+""")
+	template = ' '.join(f"{{@acc + {p}}}-{{x}}" if p % 2 else f"part{p}:{{y}}" for p in range(shape.template))
+	for k in range(shape.funs):
+		calls = ''.join(f"\tacc = @acc + f{i}_0(@acc, {k})\n" for i in imported) if k == 0 else f"\tacc = @acc + f{idx}_{k-1}(@acc, y)\n"
+		lines.append(f"""
+fun f{idx}_{k}(x:int, y:int) -> int {{
+	acc = x + y
+	if x > 1000000 {{
+		return @acc
+	}}
+{calls}{nested(shape.depth, chr(9), k)}\
+	set object = S{idx}_{k % shape.structs}(@acc)
+	item = E{idx}_{k % shape.structs}.NUMBER(@acc)
+	acc = @acc + object.get() + item.value()
+	set text = `{template}`
+	return @acc + len(text)
+}}
+""")
+	return ''.join(lines)
+
+def main_text(shape:Shape) -> str:
+	lines = [f"from {PACKET}.m{i} import f{i}_{shape.funs-1}\n" for i in range(shape.modules)]
+	lines.append("fun main() {\n\tacc = 0\n")
+	lines += [f"\tacc = @acc + f{i}_{shape.funs-1}(1000001, {i})\n" for i in range(shape.modules)]
+	lines.append("\tput`{@acc}`\n}\n")
+	return ''.join(lines)
+
+def generate(directory:str, shape:Shape) -> str:
+	"""writes program into `directory`, returns path of the main file"""
+	os.makedirs(directory)
+	for idx in range(shape.modules):
+		with open(os.path.join(directory, f'm{idx}.ja'), 'w', encoding='utf-8') as file:
+			file.write(module_text(idx, shape))
+	main = os.path.join(directory, 'main.ja')
+	with open(main, 'w', encoding='utf-8') as file:
+		file.write(main_text(shape))
+	return main
+
+def compile_once(file:str) -> tuple[dict[str, float], dict[str, int]]:
+	"""seconds spent in every phase, and size of the program"""
+	passes = Passes(True, memory=False)
+	config = Config.use_defaults(ErrorBin(), file, cache=False, passes=passes)
+	types.reset_interned()#every run compiles the program anew, types of the previous run would only take memory
+	module = extract_module_from_file_path(file, config)
+	config.errors.show_errors()
+	assert module is not None
+	start = time.perf_counter()
+	TypeChecker(module, config).go_check()
+	checked = time.perf_counter()
+	config.errors.show_errors()
+	generator = GenerateAssembly(module, config)
+	generated = time.perf_counter()
+	config.errors.show_errors()
+	seconds = {phase:sum(r.seconds for r in passes.records.values() if r.phase == phase) for phase in ('lex', 'parse')}
+	seconds['type check'] = checked - start
+	seconds['generate'] = generated - checked
+	sizes = {
+		'tokens':sum(counts['tokens'] for counts in passes.counts.values()),
+		'ir lines':sum(gen.ir_lines() for gen in generator.generators().values()),
+	}
+	return seconds, sizes
+
+def main() -> None:
+	tune_gc()#same collector settings, as the compiler
+	scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+	runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+	baseline = sys.argv[3] if len(sys.argv) > 3 else None
+	shape = Shape().scaled(scale)
+	root = tempfile.mkdtemp(prefix='jararaca-bench-')
+	link = os.path.join(JARARACA_PATH, 'packets', PACKET+'.link')
+	try:
+		file = generate(os.path.join(root, PACKET), shape)
+		pack_directory(os.path.dirname(file))
+		best = {phase:float('inf') for phase in PHASES}
+		for _ in range(runs):
+			gc.collect()#garbage of the previous run is not collected during this one
+			seconds, sizes = compile_once(file)
+			best = {phase:min(best[phase], seconds[phase]) for phase in PHASES}
+	finally:
+		shutil.rmtree(root, ignore_errors=True)
+		if os.path.exists(link):
+			os.remove(link)
+	print(f"{shape}: {sizes['tokens']} tokens, {sizes['ir lines']} lines of ir")
+	for phase in PHASES:
+		print(f"{phase:>10}: {best[phase]*1e3:8.1f}ms")
+	if baseline is None:
+		return
+	result = {'shape':asdict(shape), 'python':platform.python_version(), 'sizes':sizes, 'seconds':best}
+	if not os.path.exists(baseline):
+		with open(baseline, 'w', encoding='utf-8') as f:
+			json.dump(result, f, indent='\t')
+		print(f"saved baseline to '{baseline}'")
+		return
+	with open(baseline, encoding='utf-8') as f:
+		old = json.load(f)
+	if old['shape'] != result['shape']:
+		sys.exit(f"baseline '{baseline}' was measured on {Shape(**old['shape'])}, not {shape}")
+	regressed = False
+	for phase in PHASES:
+		ratio = best[phase]/old['seconds'][phase]
+		regressed |= ratio > TOLERANCE
+		print(f"{phase:>10}: {ratio:.2f}x of baseline{' (regression)' if ratio > TOLERANCE else ''}")
+	if regressed:
+		sys.exit(1)
+if __name__ == '__main__':
+	main()
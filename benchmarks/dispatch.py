@@ -0,0 +1,56 @@
+#!/bin/env python3.10
+"""cost of dispatching one node to its handler in `TypeChecker.check` and `GenerateAssembly.visit`,
+compared with the chain of `if type(node) == ...` they used before (rebuilt from the same tables)
+usage: benchmarks/dispatch.py [calls per node type]"""
+import os
+import sys
+import time
+from typing import Any, Callable
+JARARACA_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+os.environ['JARARACA_PATH'] = JARARACA_PATH
+sys.path.insert(0, JARARACA_PATH)
+from compiler.primitives import Node, nodes, Dispatch
+from compiler.type_checker import TypeChecker
+from compiler.llvm_generator import GenerateAssembly
+
+def if_chain(dispatch:Dispatch[Any, Any], name:str) -> Callable[[Any, Node], Any]:
+	"""same `if` chain, that was used for dispatching"""
+	lines = [f"def {name}(self, node):"]
+	for node_type, handler in dispatch.handlers.items():
+		lines.append(f"\tif type(node) == nodes.{node_type.__name__}: return self.{handler.__name__}(node)")
+	namespace:dict[str, Any] = {'nodes':nodes}
+	exec('\n'.join(lines), namespace)
+	return namespace[name]
+
+def handlers_only(cls:type, dispatch:Dispatch[Any, Any]) -> Any:
+	"""instance of `cls` with every handler replaced by a no-op, so only dispatching is measured"""
+	noop = lambda self, node:None
+	table:Dispatch[Any, Any] = Dispatch()
+	for node_type in dispatch.handlers:
+		table.handles(node_type)(noop)
+	bare = type('Bare'+cls.__name__, (cls,), {'__slots__':(), 'dispatch':table, **{handler.__name__:noop for handler in dispatch.handlers.values()}})
+	return bare.__new__(bare)
+
+def measure(dispatcher:Callable[[Any, Node], Any], visitor:Any, node:Node, calls:int) -> float:
+	start = time.perf_counter()
+	for _ in range(calls):
+		dispatcher(visitor, node)
+	return (time.perf_counter() - start)/calls
+
+def main() -> None:
+	calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+	for cls, method in ((TypeChecker, 'check'), (GenerateAssembly, 'visit')):
+		dispatch = cls.dispatch
+		visitor = handlers_only(cls, dispatch)
+		chain = if_chain(dispatch, method)
+		table = getattr(cls, method)
+		before = after = 0.
+		for node_type in dispatch.handlers:
+			node = node_type.__new__(node_type)
+			b, a = measure(chain, visitor, node, calls), measure(table, visitor, node, calls)
+			before, after = before+b, after+a
+			if node_type in (nodes.Assignment, nodes.If, nodes.While):
+				print(f"{cls.__name__}.{method}({node_type.__name__:<10}): if chain {b*1e9:6.1f}ns, table {a*1e9:6.1f}ns")
+		print(f"{cls.__name__}.{method} average over {len(dispatch.handlers)} node types: if chain {before/len(dispatch.handlers)*1e9:.1f}ns, table {after/len(dispatch.handlers)*1e9:.1f}ns")
+if __name__ == '__main__':
+	main()
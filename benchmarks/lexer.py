@@ -0,0 +1,46 @@
+#!/bin/env python3.10
+"""compare `Lexer` and `FastLexer` on the same input, and memory kept by `list[Token]` and `TokenBuffer`.
+both are the current lexers: `Lexer` is the rewritten reference lexer, the original per character lexer is not kept, so it is not measured
+usage: benchmarks/lexer.py [file.ja] [times to repeat the file] [runs]"""
+import os
+import sys
+import time
+import tracemalloc
+JARARACA_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+os.environ['JARARACA_PATH'] = JARARACA_PATH
+sys.path.insert(0, JARARACA_PATH)
+from compiler.lexer import Lexer, FastLexer
+from compiler.primitives import Config, ErrorBin, extract_file_text_from_file_path, tune_gc
+
+def main() -> None:
+	tune_gc()#same collector settings, as the compiler
+	file = sys.argv[1] if len(sys.argv) > 1 else os.path.join(JARARACA_PATH, 'examples', '2048.ja')
+	repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+	runs = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+	text = extract_file_text_from_file_path(file)*repeat
+	print(f"{file} x{repeat}: {len(text)} characters, {text.count(chr(10))} lines")
+	results:dict[str, float] = {}
+	tokens:dict[str, int] = {}
+	for lexer in (Lexer, FastLexer):
+		best = float('inf')
+		for _ in range(runs):
+			config = Config.use_defaults(ErrorBin(), file)
+			start = time.perf_counter()
+			program = lexer(text, config, file).lex()
+			best = min(best, time.perf_counter() - start)
+			tokens[lexer.__name__] = len(program)
+			del program
+		results[lexer.__name__] = best
+		print(f"{lexer.__name__:>10}: {best:.3f}s, {tokens[lexer.__name__]} tokens, {best/tokens[lexer.__name__]*1e6:.2f}us per token")
+	assert tokens['Lexer'] == tokens['FastLexer'], "lexers disagree on the number of tokens"
+	print(f"FastLexer over Lexer (not over the original lexer): {results['Lexer']/results['FastLexer']:.2f}x")
+	for method in ('lex', 'lex_compact'):
+		config = Config.use_defaults(ErrorBin(), file)
+		tracemalloc.start()
+		program = getattr(FastLexer(text, config, file), method)()
+		kept = tracemalloc.get_traced_memory()[0]
+		tracemalloc.stop()
+		print(f"{method:>11}: {kept/len(program):.1f} bytes per token kept")
+		del program
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,73 @@
+#!/bin/env python3.10
+"""run time of compiled programs: every benchmark is compiled at -O0..-O3 and run several times with output thrown away.
+median wall time, maximum resident memory and size of the GC heap (from statistics libgc prints with GC_PRINT_STATS) are reported,
+outputs at all levels are compared with the one at -O0.
+linux carries peak resident memory of a process over exec, so programs can not be seen using less than this script does,
+such results are shown as `<` its peak.
+usage: benchmarks/runtime.py [runs] [benchmark.ja ...]   (default is every benchmarks/*.ja)"""
+import glob
+import hashlib
+import os
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+BENCHMARKS_PATH = os.path.dirname(os.path.realpath(__file__))
+JARARACA = os.path.join(os.path.dirname(BENCHMARKS_PATH), 'jararaca.py')
+LEVELS = ('-O0', '-O1', '-O2', '-O3')
+HEAP_GROWTH = re.compile(rb'Grow heap to (\d+) KiB')
+
+def build(file:str, level:str, directory:str) -> str|None:
+	"""path of the executable, None if compilation failed"""
+	output = os.path.join(directory, f"{os.path.splitext(os.path.basename(file))[0]}{level}")
+	if subprocess.run([sys.executable, JARARACA, level, '-o', output, file], check=False).returncode != 0:
+		return None
+	return output+'.out'
+
+def run(executable:str) -> tuple[float, int, int|None, bytes, int]:
+	"""seconds, maximum resident memory in KiB, GC heap in KiB (None if libgc did not tell), hash of output and exit code"""
+	with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+		start = time.perf_counter()
+		process = subprocess.Popen([executable], stdout=out, stderr=err, env={**os.environ, 'GC_PRINT_STATS':'1'})
+		_, status, usage = os.wait4(process.pid, 0)#usage of this child only
+		seconds = time.perf_counter() - start
+		process.returncode = os.waitstatus_to_exitcode(status)
+		out.seek(0)
+		err.seek(0)
+		hash = hashlib.sha256()
+		while chunk := out.read(1<<20):#output can be large, reading it whole would raise peak of this process
+			hash.update(chunk)
+		output = hash.digest()
+		heap = [int(size) for size in HEAP_GROWTH.findall(err.read())]
+	return seconds, usage.ru_maxrss, max(heap) if heap else None, output, process.returncode
+
+def main() -> None:
+	runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+	files = sys.argv[2:] or sorted(glob.glob(os.path.join(BENCHMARKS_PATH, '*.ja')))
+	print(f"{'benchmark':<16} {'level':<5} {'median(ms)':>10} {'max rss(MiB)':>12} {'gc heap(KiB)':>12}")
+	with tempfile.TemporaryDirectory(prefix='jararaca-runtime-') as directory:
+		for file in files:
+			name = os.path.splitext(os.path.basename(file))[0]
+			expected = None
+			for level in LEVELS:
+				executable = build(file, level, directory)
+				if executable is None:
+					print(f"{name:<16} {level:<5} compilation failed")
+					continue
+				results = [run(executable) for _ in range(runs)]
+				times = [seconds for seconds, *_ in results]
+				heaps = [heap for _, _, heap, _, _ in results if heap is not None]
+				outputs = {(output, code) for _, _, _, output, code in results}
+				if expected is None:
+					expected = outputs
+				note = '' if outputs == expected else '  output differs from the first level'
+				heap = f"{max(heaps)}" if heaps else '-'
+				rss = max(rss for _, rss, *_ in results)
+				floor = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+				memory = f"<{floor/1024:.1f}" if rss <= floor else f"{rss/1024:.1f}"
+				print(f"{name:<16} {level:<5} {statistics.median(times)*1e3:>10.1f} {memory:>12} {heap:>12}{note}")
+if __name__ == '__main__':
+	main()
@@ -3,17 +3,19 @@ from sys import argv
 from typing import NoReturn
 
 
-from .primitives import JARARACA_PATH, process_cmd_args, run_assembler, replace_self, pack_directory, id_counter, ErrorBin
+from .primitives import JARARACA_PATH, process_cmd_args, run_assembler, run_separate_assembler, replace_self, pack_directory, id_counter, ErrorBin, types, tune_gc
 from .parser import Parser
 from .type_checker import TypeChecker
 from .llvm_generator import GenerateAssembly
-from .utils import  extract_module_from_file_path, dump_module
+from .utils import  extract_module_from_file_path, dump_module, object_key
 
 pack_directory(path.join(JARARACA_PATH, 'std'))
 def main() -> NoReturn:
+	tune_gc()
 	eb = ErrorBin()
 	config = process_cmd_args(eb, argv)
 	eb.show_errors()
+	types.reset_interned()#new compilation, types of the previous one are not used
 
 	module = extract_module_from_file_path(config.file,config)
 	if module is None: eb.crash_with_errors()
@@ -21,14 +23,27 @@ def main() -> NoReturn:
 		eb.show_errors()
 		print(f"INFO: Conversion to ast step completed with id counter state '{id_counter}'")
 	dump_module(module, config)
-	TypeChecker(module, config).go_check()
+	checked_before = TypeChecker.checked_count
+	with config.passes.measure('type check'):
+		TypeChecker(module, config).go_check()
 	eb.show_errors()
+	if config.verbose:
+		print(f"INFO: Type checking step completed, {TypeChecker.checked_count - checked_before} modules checked")
 
-	txt = GenerateAssembly(module,config).text
+	with config.passes.measure('generate'):
+		generator = GenerateAssembly(module,config)
+		units = generator.separate_modules() if config.separate else None
 	eb.show_errors()
-
-	run_assembler(config,txt)
+	if config.passes.enabled:
+		for gen in generator.generators().values():
+			config.passes.count(gen.module.path, 'ir lines', gen.ir_lines())
+
+	if units is not None:
+		run_separate_assembler(config, [(unit.path, object_key(unit), text) for unit, text in units])
+	else:
+		run_assembler(config,generator.text)
 	eb.show_errors()
+	config.passes.report()
 
 	if config.interpret:
 		replace_self(["lli",config.optimization, '-load', 'libgc.so', '--fake-argv0',f"{config.file}",f'{config.output_file}.bc',*config.argv],config)
@@ -0,0 +1,84 @@
+from dataclasses import fields
+from functools import cache
+from typing import Callable, Iterator
+from .primitives import Node, nodes, TT, Scope
+__all__ = [
+	'EscapeAnalysis',
+]
+@cache
+def child_fields(cls:type) -> tuple[str, ...]:
+	return tuple(f.name for f in fields(cls) if f.name not in ('uid', 'place'))
+def children(node:Node) -> Iterator[Node]:
+	for name in child_fields(type(node)):
+		value = getattr(node, name)
+		if isinstance(value, Node):
+			yield value
+		elif isinstance(value, tuple):
+			for item in value:
+				if isinstance(item, Node):
+					yield item
+UNTRACKED = -1#names, that are not variables of the function (arguments, `set` names, matched values)
+class EscapeAnalysis:
+	"""finds variables of a function, whose address never leaves it.
+	if the name of a variable is only used to load from it (`@name`) or to store into it (`name = value`),
+	nothing can see the variable after the function returns, so it can live on the stack.
+	names are resolved the same way `GenerateAssembly` resolves them"""
+	__slots__ = ('defined', 'names', 'variables', 'escaping')
+	def __init__(self, fun:nodes.Fun, defined:Callable[[str], bool]) -> None:
+		self.defined  :Callable[[str], bool] = defined#is name defined outside of the function
+		self.names    :Scope[int]            = Scope()#name -> uid of the node, that created the variable
+		self.variables:set[int]              = set()
+		self.escaping :set[int]              = set()
+		self.names.enter()
+		for arg in fun.arg_types:
+			self.names[arg.name.operand] = UNTRACKED
+		self.walk(fun.code)
+		self.names.leave()
+	@property
+	def non_escaping(self) -> set[int]:
+		"""uids of Assignments, Declarations and VariableSaves, that create variables, that do not escape"""
+		return self.variables - self.escaping
+	def define(self, name:str, uid:int) -> None:
+		self.names[name] = uid
+		if uid != UNTRACKED:
+			self.variables.add(uid)
+	def walk(self, node:Node) -> None:
+		if isinstance(node, nodes.ReferTo):#address is used as a value
+			uid = self.names.get(node.name.operand)
+			if uid is not None and uid != UNTRACKED:
+				self.escaping.add(uid)
+		elif isinstance(node, nodes.UnaryExpression) and node.operation == TT.AT and isinstance(node.left, nodes.ReferTo):
+			pass#load
+		elif isinstance(node, nodes.Save) and isinstance(node.space, nodes.ReferTo):
+			self.walk(node.value)#store
+		elif isinstance(node, nodes.Assignment):
+			self.walk(node.value)
+			self.define(node.var.name.operand, node.uid)
+		elif isinstance(node, nodes.Declaration):
+			if node.times is not None:
+				self.walk(node.times)
+			self.define(node.var.name.operand, node.uid)
+		elif isinstance(node, nodes.VariableSave):
+			self.walk(node.value)
+			if node.space.operand not in self.names and not self.defined(node.space.operand):
+				self.define(node.space.operand, node.uid)
+		elif isinstance(node, nodes.Set):
+			self.walk(node.value)
+			self.define(node.name.operand, UNTRACKED)
+		elif isinstance(node, nodes.Code):
+			self.names.enter()
+			for statement in node.statements:
+				self.walk(statement)
+			self.names.leave()
+		elif isinstance(node, nodes.Match):
+			self.walk(node.value)
+			for case in node.cases:
+				self.names.enter()
+				self.define(node.match_as.operand, UNTRACKED)
+				self.walk(case.body)
+				self.names.leave()
+			if node.default is not None:
+				self.walk(node.default)
+		else:
+			for child in children(node):
+				self.walk(child)
@@ -1,231 +1,393 @@
-from .primitives import Place, TT, Token, ET, DIGITS_BIN, DIGITS_HEX, DIGITS_OCTAL, DIGITS, KEYWORDS, WHITESPACE, WORD_FIRST_CHAR_ALPHABET, WORD_ALPHABET, Config, ESCAPE_TO_CHARS
-from .primitives.token import draft_loc
+import re
+from typing import Iterator
+from .primitives import Place, TT, Token, ET, DIGITS_BIN, DIGITS_HEX, DIGITS_OCTAL, DIGITS, KEYWORDS, WHITESPACE, WORD_FIRST_CHAR_ALPHABET, WORD_ALPHABET, Config, ESCAPE_TO_CHARS, Loc
+from .primitives.core import make_loc, make_place
+from .primitives.token import LineTable, TokenBuffer, make_token
+SYMBOLS = {
+	'{':TT.LEFT_CURLY_BRACKET,
+	'}':TT.RIGHT_CURLY_BRACKET,
+	'[':TT.LEFT_SQUARE_BRACKET,
+	']':TT.RIGHT_SQUARE_BRACKET,
+	'(':TT.LEFT_PARENTHESIS,
+	')':TT.RIGHT_PARENTHESIS,
+	'+':TT.PLUS,
+	'%':TT.PERCENT,
+	'$':TT.DOLLAR,
+	'@':TT.AT,
+	',':TT.COMMA,
+	'.':TT.DOT,
+	':':TT.COLON,
+	'*':TT.ASTERISK,
+	'=':TT.EQUALS,
+	'!':TT.NOT,
+	'>':TT.GREATER,
+	'<':TT.LESS,
+	'-':TT.MINUS,
+	'//':TT.DOUBLE_SLASH,
+	'==':TT.DOUBLE_EQUALS,
+	'!=':TT.NOT_EQUALS,
+	'>=':TT.GREATER_OR_EQUAL,
+	'>>':TT.DOUBLE_GREATER,
+	'<=':TT.LESS_OR_EQUAL,
+	'<<':TT.DOUBLE_LESS,
+	'->':TT.ARROW,
+}
 class Lexer:
-	__slots__ = ('text', 'config', 'file_name', 'loc')
+	__slots__ = ('text', 'config', 'file_name', 'idx', 'lines')
 	def __init__(self, text:str, config:Config, file_name:str):
 		self.text = text
 		self.config = config
 		self.file_name = file_name
-		self.loc = draft_loc(file_name, text, config)
+		self.idx = 0
+		self.lines = LineTable(file_name, text)
+	@property
+	def char(self) -> str:
+		return self.text[self.idx]
+	@property
+	def more(self) -> bool:
+		return self.idx < len(self.text)-1
+	def to_loc(self) -> Loc:
+		return self.lines.to_loc(self.idx)
+	def place(self, start:int) -> Place:
+		"""place from offset `start` to the current offset"""
+		return make_place(self.lines.to_loc(start), self.to_loc())
+	def moved(self, number:int) -> int:
+		"""index `number` characters ahead, errors on going past the end of file"""
+		if self.idx+number>=len(self.text):
+			self.config.errors.add_error(ET.EOF, Place(self.to_loc(),self.to_loc()), "unexpected end of file while lexing")
+			return len(self.text)-1
+		return self.idx+number
+	def adv(self, number:int = 1) -> None:
+		self.idx = self.moved(number)
 	def lex(self) -> list[Token]:
-		program:list[Token] = []
-		while self.loc:
-			program += self.lex_token()
-		program.append(Token(Place(self.loc.to_loc(),self.loc.to_loc()), TT.EOF))
-		return program
+		return list(self.stream())
+	def stream(self) -> Iterator[Token]:
+		"""lex lazily, tokens are produced as they are consumed"""
+		while self.more:
+			yield from self.lex_token()
+		yield Token(Place(self.to_loc(),self.to_loc()), TT.EOF)
+	def spans(self) -> Iterator[tuple[TT,int,int,str]]:
+		"""type, start offset, end offset and operand of every token"""
+		for token in self.stream():
+			yield token.typ, token.place.start.idx, token.place.end.idx, token.operand
+	def lex_compact(self) -> TokenBuffer:
+		buffer = TokenBuffer(self.lines)
+		append = buffer.append
+		for typ, start, end, operand in self.spans():
+			append(typ, start, end, operand)
+		return buffer
 	def lex_token(self) -> list[Token]:
-		char = self.loc.char
-		start_loc = self.loc.to_loc()
+		char = self.char
+		start = self.idx
 		if char in '][}{()+%:,.$@*':
-			self.loc+=1
-			return [Token(Place(start_loc,self.loc.to_loc()),
-			{
-				'{':TT.LEFT_CURLY_BRACKET,
-				'}':TT.RIGHT_CURLY_BRACKET,
-				'[':TT.LEFT_SQUARE_BRACKET,
-				']':TT.RIGHT_SQUARE_BRACKET,
-				'(':TT.LEFT_PARENTHESIS,
-				')':TT.RIGHT_PARENTHESIS,
-				'+':TT.PLUS,
-				'%':TT.PERCENT,
-				'$':TT.DOLLAR,
-				'@':TT.AT,
-				',':TT.COMMA,
-				'.':TT.DOT,
-				':':TT.COLON,
-				'*':TT.ASTERISK,
-			}[char])]
+			self.adv()
+			return [Token(self.place(start), SYMBOLS[char])]
 		elif char == '\\':#escape any char with one-char comment
-			self.loc+=2
+			self.adv(2)
 			return []
 		elif char in WHITESPACE:
-			self.loc +=1
+			self.adv()
 			if char == '\n':
-				return [Token(Place(start_loc,self.loc.to_loc()), TT.NEWLINE)]
+				return [Token(self.place(start), TT.NEWLINE)]
 			return []
 		elif char in DIGITS:
 			return [self.lex_digits()]
 		elif char in WORD_FIRST_CHAR_ALPHABET:
 			word = char
-			self.loc+=1
-			while self.loc.char in WORD_ALPHABET and self.loc:
-				word+=self.loc.char
-				self.loc+=1
-			return [Token(Place(start_loc,self.loc.to_loc()),
+			self.adv()
+			while self.char in WORD_ALPHABET and self.more:
+				word+=self.char
+				self.adv()
+			return [Token(self.place(start),
 			TT.KEYWORD if word in KEYWORDS else TT.WORD,
 			word)]
 		elif char in "'\"":#strings
-			self.loc+=1
+			self.adv()
 			word = ''
-			while self.loc.char != char and self.loc:
-				if self.loc.char == '\\':
-					l=self.loc
-					self.loc+=1
-					if self.loc.char == 'x':#any char
-						self.loc+=1
-						escape = self.loc.char
-						self.loc+=1
-						escape += self.loc.char
-						self.loc+=1
+			while self.char != char and self.more:
+				if self.char == '\\':
+					l=self.idx
+					self.adv()
+					if self.char == 'x':#any char
+						self.adv()
+						escape = self.char
+						self.adv()
+						escape += self.char
+						self.adv()
 						if escape[0] not in DIGITS_HEX or escape[1] not in DIGITS_HEX:
-							self.config.errors.add_error(ET.STR_ANY_CHAR, Place(l.to_loc(),self.loc.to_loc()), "expected 2 hex digits after \'\\x\' to create char with that ascii code")
+							self.config.errors.add_error(ET.STR_ANY_CHAR, self.place(l), "expected 2 hex digits after \'\\x\' to create char with that ascii code")
 							escape = '00'
 						word+=chr(int(escape,16))
 						continue
-					word+=ESCAPE_TO_CHARS.get(self.loc.char, '')
-					self.loc+=1
+					word+=ESCAPE_TO_CHARS.get(self.char, '')
+					self.adv()
 					continue
-				word+=self.loc.char
-				self.loc+=1
-			self.loc+=1
-			if self.loc.char == 'c':
-				self.loc+=1
+				word+=self.char
+				self.adv()
+			self.adv()
+			if self.char == 'c':
+				self.adv()
 				if len(word) != 1:
-					self.config.errors.add_error(ET.CHARACTER,Place(start_loc,self.loc.to_loc()),f"expected a string of length 1 because of 'c' prefix, actual length is {len(word)}")
+					self.config.errors.add_error(ET.CHARACTER,self.place(start),f"expected a string of length 1 because of 'c' prefix, actual length is {len(word)}")
 				if len(word) < 1:
 					word = chr(0)
-				return [Token(Place(start_loc,self.loc.to_loc()), TT.CHAR_STR, word[0])]
-			return [Token(Place(start_loc,self.loc.to_loc()), TT.STR, word)]
+				return [Token(self.place(start), TT.CHAR_STR, word[0])]
+			return [Token(self.place(start), TT.STR, word)]
 		elif char == '`':#template strings
 			return self.lex_template_strings()
 		elif char == '/':
-			self.loc+=1
-			if self.loc.char == '/':
-				self.loc+=1
+			self.adv()
+			if self.char == '/':
+				self.adv()
 			else:
-				self.config.errors.add_error(ET.DIVISION, Place(start_loc,self.loc.to_loc()), "accurate division '/' is not supported yet")
-			token = Token(Place(start_loc,self.loc.to_loc()), TT.DOUBLE_SLASH)
+				self.config.errors.add_error(ET.DIVISION, self.place(start), "accurate division '/' is not supported yet")
+			token = Token(self.place(start), TT.DOUBLE_SLASH)
 			return [token]
 		elif char == '=':
-			self.loc+=1
-			token = Token(Place(start_loc,self.loc.to_loc()), TT.EQUALS)
-			if self.loc.char == '=':
-				self.loc+=1
-				token = Token(Place(start_loc,self.loc.to_loc()), TT.DOUBLE_EQUALS)
+			self.adv()
+			token = Token(self.place(start), TT.EQUALS)
+			if self.char == '=':
+				self.adv()
+				token = Token(self.place(start), TT.DOUBLE_EQUALS)
 			return [token]
 		elif char == '!':
-			self.loc+=1
-			token = Token(Place(start_loc,self.loc.to_loc()), TT.NOT)
-			if self.loc.char == '=':
-				self.loc+=1
-				token = Token(Place(start_loc,self.loc.to_loc()), TT.NOT_EQUALS)
+			self.adv()
+			token = Token(self.place(start), TT.NOT)
+			if self.char == '=':
+				self.adv()
+				token = Token(self.place(start), TT.NOT_EQUALS)
 			return [token]
 		elif char == '>':
-			self.loc+=1
-			token = Token(Place(start_loc,self.loc.to_loc()), TT.GREATER)
-			if self.loc.char == '=':
-				self.loc+=1
-				token = Token(Place(start_loc,self.loc.to_loc()), TT.GREATER_OR_EQUAL)
-			elif self.loc.char == '>':
-				self.loc+=1
-				token = Token(Place(start_loc,self.loc.to_loc()), TT.DOUBLE_GREATER)
+			self.adv()
+			token = Token(self.place(start), TT.GREATER)
+			if self.char == '=':
+				self.adv()
+				token = Token(self.place(start), TT.GREATER_OR_EQUAL)
+			elif self.char == '>':
+				self.adv()
+				token = Token(self.place(start), TT.DOUBLE_GREATER)
 			return [token]
 		elif char == '<':
-			self.loc+=1
-			token = Token(Place(start_loc,self.loc.to_loc()), TT.LESS)
-			if self.loc.char == '=':
-				self.loc+=1
-				token = Token(Place(start_loc,self.loc.to_loc()), TT.LESS_OR_EQUAL)
-			elif self.loc.char == '<':
-				self.loc+=1
-				token = Token(Place(start_loc,self.loc.to_loc()), TT.DOUBLE_LESS)
+			self.adv()
+			token = Token(self.place(start), TT.LESS)
+			if self.char == '=':
+				self.adv()
+				token = Token(self.place(start), TT.LESS_OR_EQUAL)
+			elif self.char == '<':
+				self.adv()
+				token = Token(self.place(start), TT.DOUBLE_LESS)
 			return [token]
 		elif char == '-':
-			token = Token(Place(start_loc,self.loc.to_loc()), TT.MINUS)
-			self.loc+=1
-			if self.loc.char == '>':
-				self.loc+=1
-				token = Token(Place(start_loc,self.loc.to_loc()), TT.ARROW)
+			token = Token(self.place(start), TT.MINUS)
+			self.adv()
+			if self.char == '>':
+				self.adv()
+				token = Token(self.place(start), TT.ARROW)
 			return [token]
 		elif char == '#':
-			while self.loc.char != '\n' and self.loc:
-				self.loc+=1
+			while self.char != '\n' and self.more:
+				self.adv()
 			return []
 		else:
-			self.loc+=1
-			self.config.errors.add_error(ET.ILLEGAL_CHAR, Place(start_loc,self.loc.to_loc()), f"illegal character '{char}'")
+			self.adv()
+			self.config.errors.add_error(ET.ILLEGAL_CHAR, self.place(start), f"illegal character '{char}'")
 			return []
 		assert False, "Unreachable"
 	def lex_digits(self) -> Token:
-		start_loc = self.loc.to_loc()
-		char = self.loc.char
-		self.loc += 1
+		start = self.idx
+		char = self.char
+		self.adv()
 		word = char
 		digs = DIGITS
 		base = 10
-		if word == '0' and self.loc.char in 'xbo':
+		if word == '0' and self.char in 'xbo':
 			word = ''
-			if self.loc.char == 'x':#hex
+			if self.char == 'x':#hex
 				digs,base = DIGITS_HEX,16
-			elif self.loc.char == 'b':#binary
+			elif self.char == 'b':#binary
 				digs,base = DIGITS_BIN,2
-			elif self.loc.char == 'o':#octal
+			elif self.char == 'o':#octal
 				digs,base = DIGITS_OCTAL,8
 			else:
 				assert False, "Unreachable"
-			self.loc+=1
-		while self.loc.char in digs+'_' and self.loc:
-			if self.loc.char != '_':
-				word+=self.loc.char
-			self.loc+=1
+			self.adv()
+		while self.char in digs+'_' and self.more:
+			if self.char != '_':
+				word+=self.char
+			self.adv()
 		if len(word) == 0:
-			self.config.errors.add_error(ET.ILLEGAL_NUMBER, Place(start_loc,self.loc.to_loc()), "expected a number, but got nothing")
+			self.config.errors.add_error(ET.ILLEGAL_NUMBER, self.place(start), "expected a number, but got nothing")
 			word = '0'
 		word = str(int(word,base=base))
-		if self.loc.char == 'c':#char
-			self.loc+=1
-			return Token(Place(start_loc,self.loc.to_loc()), TT.CHAR_NUM, word)
-		if self.loc.char == 's':#char
-			self.loc+=1
-			return Token(Place(start_loc,self.loc.to_loc()), TT.SHORT, word)
-		return Token(Place(start_loc,self.loc.to_loc()), TT.INT, word)
+		if self.char == 'c':#char
+			self.adv()
+			return Token(self.place(start), TT.CHAR_NUM, word)
+		if self.char == 's':#char
+			self.adv()
+			return Token(self.place(start), TT.SHORT, word)
+		return Token(self.place(start), TT.INT, word)
 	def lex_template_strings(self) -> list[Token]:
-		start_loc = self.loc.to_loc()
-		self.loc += 1 # `
+		start = self.idx
+		self.adv() # `
 		word = ''
 		tokens:list[Token] = []
-		while self.loc.char != '`' and self.loc:
-			if self.loc.char == '{':
-				self.loc+=1
-				if self.loc.char != '{':
-					tokens.append(Token(Place(start_loc,self.loc.to_loc()), TT.TEMPLATE_MIDDLE if len(tokens) != 0 else TT.TEMPLATE_HEAD, word))
+		while self.char != '`' and self.more:
+			if self.char == '{':
+				self.adv()
+				if self.char != '{':
+					tokens.append(Token(self.place(start), TT.TEMPLATE_MIDDLE if len(tokens) != 0 else TT.TEMPLATE_HEAD, word))
 					tok = self.lex_token()
-					while ((tok[0].typ != TT.RIGHT_CURLY_BRACKET) if len(tok) == 1 else True) and self.loc:
+					while ((tok[0].typ != TT.RIGHT_CURLY_BRACKET) if len(tok) == 1 else True) and self.more:
 						tokens+=tok
 						tok = self.lex_token()
 					word = ''
-					start_loc = tok[0].place.start
+					start = tok[0].place.start.idx
 					continue
-			if self.loc.char == '}':
-				l = self.loc.to_loc()
-				if (self.loc+1).char != '}':
-					self.config.errors.add_error(ET.TEMPLATE_DR_CURLY, Place(l,self.loc.to_loc()), "single '}' are not allowed in template strings, use '}}' instead")
+			if self.char == '}':
+				l = self.idx
+				if self.text[self.moved(1)] != '}':
+					self.config.errors.add_error(ET.TEMPLATE_DR_CURLY, self.place(l), "single '}' are not allowed in template strings, use '}}' instead")
 				else:
-					self.loc+=1
-			if self.loc.char == '\\':
-				if self.loc.char == '\\':
-					l=self.loc.to_loc()
-					self.loc+=1
-					if self.loc.char == 'x':#any char
-						self.loc+=1
-						escape = self.loc.char
-						self.loc+=1
-						escape += self.loc.char
-						self.loc+=1
+					self.adv()
+			if self.char == '\\':
+				if self.char == '\\':
+					l=self.idx
+					self.adv()
+					if self.char == 'x':#any char
+						self.adv()
+						escape = self.char
+						self.adv()
+						escape += self.char
+						self.adv()
 						if escape[0] not in DIGITS_HEX or escape[1] not in DIGITS_HEX:
-							self.config.errors.add_error(ET.TEMPLATE_ANY_CHAR, Place(l,self.loc.to_loc()), "expected 2 hex digits after \'\\x\' to create char with that ascii code")
+							self.config.errors.add_error(ET.TEMPLATE_ANY_CHAR, self.place(l), "expected 2 hex digits after \'\\x\' to create char with that ascii code")
 							escape = '00'
 						word+=chr(int(escape,16))
 						continue
-					word+=ESCAPE_TO_CHARS.get(self.loc.char, '')
-					self.loc+=1
+					word+=ESCAPE_TO_CHARS.get(self.char, '')
+					self.adv()
 					continue
-			word += self.loc.char
-			self.loc += 1
-		self.loc+=1
-		tokens.append(Token(Place(start_loc,self.loc.to_loc()), TT.TEMPLATE_TAIL if len(tokens) != 0 else TT.NO_MIDDLE_TEMPLATE, word))
+			word += self.char
+			self.adv()
+		self.adv()
+		tokens.append(Token(self.place(start), TT.TEMPLATE_TAIL if len(tokens) != 0 else TT.NO_MIDDLE_TEMPLATE, word))
 		return tokens
 
-def lex(text:str, config:Config, file_name:str) -> 'list[Token]':
-	return Lexer(text, config, file_name).lex()
+TOKEN_PATTERN = re.compile(r"""
+	 (?P<skip>[\ \t\r\v\f\b\a]+|\#[^\n]*|\\[\s\S])
+	|(?P<newline>\n)
+	|(?P<word>[a-zA-Z_][a-zA-Z_0-9]*)
+	|(?P<number>(?:0x(?P<hex>[0-9AaBbCcDdEeFf_]*)|0b(?P<bin>[01_]*)|0o(?P<oct>[0-7_]*)|(?P<dec>[0-9][0-9_]*))(?P<suffix>[cs]?))
+	|(?P<string>(?P<quoted>"[^"\\]*"|'[^'\\]*')(?P<char>c?))
+	|(?P<symbol>->|//|==|!=|>=|<=|>>|<<|[][}{()+%:,.$@*=!<>-])
+""", re.VERBOSE)
+KEYWORD_SET = frozenset(KEYWORDS)
+NUMBER_SUFFIXES = {
+	'c':TT.CHAR_NUM,
+	's':TT.SHORT,
+	'':TT.INT,
+}
+class FastLexer(Lexer):
+	"""Lexer, that consumes common tokens with one regex match each.
+	Anything unusual (escapes, template strings, errors, tokens next to the end of file) is left to `Lexer`, so tokens are exactly the same"""
+	__slots__ = ()
+	def lex(self) -> list[Token]:
+		return list(self.stream())
+	def spans(self) -> Iterator[tuple[TT,int,int,str]]:
+		"""same as `Lexer.spans`, but common tokens never become `Token`s"""
+		text = self.text
+		end = len(text)-1
+		match = TOKEN_PATTERN.match
+		while self.idx < end:
+			start = self.idx
+			m = match(text, start, end)
+			if m is not None:
+				stop = m.end()
+				if m.lastgroup == 'skip':
+					self.idx = stop
+					continue
+				typed = self.classify(m, end)
+				if typed is not None:
+					self.idx = stop
+					typ, operand = typed
+					if typ == TT.MINUS:# `Lexer` gives '-' an empty place
+						stop = start
+					yield typ, start, stop, operand
+					continue
+			for token in Lexer.lex_token(self):
+				yield token.typ, token.place.start.idx, token.place.end.idx, token.operand
+		yield TT.EOF, self.idx, self.idx, ''
+	def stream(self) -> Iterator[Token]:
+		file_path = self.file_name
+		line_starts = self.lines.line_starts
+		line = 1# offsets only grow, so the line is tracked instead of searched for
+		last_loc = make_loc(file_path, 0, 1, 1)# tokens often start where previous ended, reuse that Loc
+		for typ, start, stop, operand in self.spans():
+			if last_loc.idx == start:
+				start_loc = last_loc
+			else:
+				while line < len(line_starts) and line_starts[line] <= start:
+					line += 1
+				start_loc = last_loc = make_loc(file_path, start, line, start - line_starts[line-1] + 1)
+			if stop != start:
+				while line < len(line_starts) and line_starts[line] <= stop:
+					line += 1
+				last_loc = make_loc(file_path, stop, line, stop - line_starts[line-1] + 1)
+			yield make_token(make_place(start_loc, last_loc), typ, operand)
+	def lex_token(self) -> list[Token]:
+		end = len(self.text)-1
+		m = TOKEN_PATTERN.match(self.text, self.idx, end)
+		if m is None:
+			return Lexer.lex_token(self)
+		start, stop = m.span()
+		if m.lastgroup == 'skip':
+			self.idx = stop
+			return []
+		typed = self.classify(m, end)
+		if typed is None:
+			return Lexer.lex_token(self)
+		typ, operand = typed
+		self.idx = stop
+		if typ == TT.MINUS:
+			loc = self.lines.to_loc(start)
+			return [Token(Place(loc, loc), typ)]
+		return [Token(self.place(start), typ, operand)]
+	@staticmethod
+	def classify(m:'re.Match[str]', end:int) -> tuple[TT,str]|None:
+		"""type and operand of a token matched by TOKEN_PATTERN, None if `Lexer` has to lex it"""
+		kind = m.lastgroup
+		if kind == 'word':
+			operand = m.group()
+			return (TT.KEYWORD if operand in KEYWORD_SET else TT.WORD), operand
+		if kind == 'newline':
+			return TT.NEWLINE, ''
+		if m.end() == end:
+			return None# `Lexer` looks past the last character here
+		if kind == 'symbol':
+			return SYMBOLS[m.group()], ''
+		if kind == 'number':
+			digits, base = m.group('dec'), 10
+			if digits is None:
+				digits, base = m.group('hex'), 16
+			if digits is None:
+				digits, base = m.group('bin'), 2
+			if digits is None:
+				digits, base = m.group('oct'), 8
+			digits = digits.replace('_','')
+			if digits == '':
+				return None
+			return NUMBER_SUFFIXES[m.group('suffix')], str(int(digits,base=base))
+		if kind == 'string':
+			operand = m.group('quoted')[1:-1]
+			if m.group('char') == '':
+				return TT.STR, operand
+			if len(operand) != 1:
+				return None
+			return TT.CHAR_STR, operand
+		assert False, "Unreachable"
+
+def lex(text:str, config:Config, file_name:str, lexer:type[Lexer] = FastLexer) -> 'list[Token]':
+	return lexer(text, config, file_name).lex()
+def stream(text:str, config:Config, file_name:str, lexer:type[Lexer] = FastLexer) -> 'Iterator[Token]':
+	return lexer(text, config, file_name).stream()
 
@@ -1,7 +1,9 @@
-from typing import Callable
+import re
+from typing import Callable, ClassVar, Iterator
 
-from .primitives import Node, nodes, TT, Config, Type, types, DEFAULT_TEMPLATE_STRING_FORMATTER, INT_TO_STR_CONVERTER, CHAR_TO_STR_CONVERTER, MAIN_MODULE_PATH, BUILTIN_WORDS, STRING_MULTIPLICATION, BOOL_TO_STR_CONVERTER
+from .primitives import Node, nodes, TT, Config, Type, types, DEFAULT_TEMPLATE_STRING_FORMATTER, INT_TO_STR_CONVERTER, CHAR_TO_STR_CONVERTER, MAIN_MODULE_PATH, BUILTIN_WORDS, STRING_MULTIPLICATION, BOOL_TO_STR_CONVERTER, OUTPUT_FLUSHER, Scope, Dispatch
 from dataclasses import dataclass
+from .escape_analysis import EscapeAnalysis
 
 @dataclass(slots=True, frozen=True)
 class TV:#typed value
@@ -28,26 +30,61 @@ class MixTypeTv(Type):
 	def llvm(self) -> str:
 		raise Exception(f"Mix type does not make sense in llvm, {self}")
 
-imported_modules_paths:'dict[str,GenerateAssembly]' = {}
+class Emitter:
+	"""generated llvm ir as a list of chunks, other Emitters can be chunks too.
+	appending does not copy text, it is joined (or written out) once at the end"""
+	__slots__ = ('chunks',)
+	def __init__(self) -> None:
+		self.chunks:list[str|Emitter] = []
+	def __iadd__(self, chunk:'str|Emitter') -> 'Emitter':
+		self.chunks.append(chunk)
+		return self
+	def __iter__(self) -> Iterator[str]:
+		for chunk in self.chunks:
+			if isinstance(chunk, str):
+				yield chunk
+			else:
+				yield from chunk
+	def __str__(self) -> str:
+		return ''.join(self)
+@dataclass(slots=True, frozen=True)
+class Symbol:
+	"""global of a module, that other modules can use, when every module is compiled on its own"""
+	name:str#does not depend on uids, so objects from different compilations link together
+	declaration:str#what declares it in other modules
+GLOBAL_NAME = re.compile(r'@"[^"]*"|@[-\w$.]+')
+
 class GenerateAssembly:
-	__slots__ = ('text','module','config', 'funs', 'strings', 'names', 'modules', 'type_names')
-	def __init__(self, module:nodes.Module, config:Config) -> None:
+	__slots__ = ('text','module','config', 'funs', 'strings', 'names', 'modules', 'type_names', 'stack_variables', 'allocas', 'symbols', 'types', 'linkage', 'generated')
+	dispatch:'ClassVar[Dispatch[GenerateAssembly, TV]]' = Dispatch()#node type -> its visit_ method
+	type_dispatch:'ClassVar[Dispatch[GenerateAssembly, Type]]' = Dispatch()#type node type -> its check_ method, they give types, not values
+	def __init__(self, module:nodes.Module, config:Config, generated:'dict[str,GenerateAssembly]|None' = None) -> None:
 		self.config     :Config                    = config
 		self.module     :nodes.Module              = module
-		self.text       :str                       = ''
-		self.strings    :list[str]                 = []
-		self.names      :dict[str,TV]              = {}
+		self.text       :Emitter                   = Emitter()
+		self.strings    :dict[str,int]             = {}#literal -> index of its constant, every literal is emitted once
+		self.names      :Scope[TV]                 = Scope()
 		self.modules    :dict[int,GenerateAssembly]= {}
 		self.type_names :dict[str,Type]            = {}
+		self.stack_variables:set[int]              = set()#uids of nodes, that create variables, that do not escape current function
+		self.allocas    :Emitter|None              = None#entry block of current function
+		self.symbols    :dict[str,Symbol]          = {}#llvm names of globals, defined here -> how other modules see them
+		self.types      :Emitter                   = Emitter()#definitions of named types
+		self.linkage    :str                       = '' if config.separate else 'private'
+		self.generated  :dict[str,GenerateAssembly]= {} if generated is None else generated#shared by the whole compilation, module path -> its generator
 		self.generate_assembly()
+	@dispatch.handles(nodes.FromImport)
 	def visit_from_import(self,node:nodes.FromImport) -> TV:
 		return TV()
+	@dispatch.handles(nodes.Import)
 	def visit_import(self, node:nodes.Import) -> TV:
 		return TV()
+	@dispatch.handles(nodes.Fun)
 	def visit_fun(self, node:nodes.Fun, name:str|None=None) -> TV:
 		if name is None:
 			return self.visit_fun(node, node.llvmid)
-		old = self.names.copy()
+		self.stack_variables = EscapeAnalysis(node, self.names.__contains__).non_escaping
+		self.names.enter()
 		for arg in node.arg_types:
 			self.names[arg.name.operand] = TV(self.check(arg.typ),f'%argument{arg.uid}')
 		ot = self.check(node.return_type) if node.return_type is not None else types.VOID
@@ -63,18 +100,26 @@ define i64 @main(i32 %0, i8** %1){{;entry point
 """
 		else:
 			self.text += f"""
-define private {ot.llvm} {name}\
+define {self.linkage} {ot.llvm} {name}\
 ({', '.join(f'{self.check(arg.typ).llvm} %argument{arg.uid}' for arg in node.arg_types)}) {{
 	{f'%return_variable = alloca {ot.llvm}' if ot != types.VOID else ''}
 """
+		self.allocas = Emitter()
+		self.text += self.allocas
 		self.visit(node.code)
+		self.allocas = None
+		self.stack_variables = set()
 
 		if node.name.operand == 'main':
+			if self.module.builtin_module is not None:#taken from std.builtin itself, so `flush` of the program does not replace it
+				flusher = self.modules[self.module.builtin_module.uid].names.get(OUTPUT_FLUSHER)
+				assert flusher is not None, "OUTPUT_FLUSHER was not defined in std.builtin"
+				self.call_helper(flusher, [], f"flush_output.{node.uid}")
 			self.text += f"""\
 	ret i64 0
 }}
 """
-			self.names = old
+			self.names.leave()
 			assert node.arg_types == ()
 			assert node.return_type is None or self.check(node.return_type) == types.VOID
 			return TV()
@@ -85,13 +130,14 @@ return:
 	ret {ot.llvm} %retval''' if ot != types.VOID else 'ret void'}
 }}
 """
-		self.names = old
+		self.names.leave()
 		return TV()
+	@dispatch.handles(nodes.Code)
 	def visit_code(self, node:nodes.Code) -> TV:
-		name_before = self.names.copy()
+		self.names.enter()
 		for statement in node.statements:
 			self.visit(statement)
-		self.names = name_before
+		self.names.leave()
 		return TV()
 	def call_helper(self, func:TV, args:list[TV], uid:str) -> TV:
 		actual_types = [arg.typ for arg in args]
@@ -145,39 +191,47 @@ return:
 		if return_tv is None:
 			return_tv = TV(fun.typ.return_type, f"%callresult.{uid}" if fun.typ.return_type != types.VOID else '')
 		return return_tv
+	@dispatch.handles(nodes.Call)
 	def visit_call(self, node:nodes.Call) -> TV:
 		args = [self.visit(arg) for arg in node.args]
 		return self.call_helper(self.visit(node.func), args, f"actual_call_node.{node.uid}")
+	@dispatch.handles(nodes.Str)
 	def visit_str(self, node:nodes.Str) -> TV:
 		return self.create_str_helper(node.token.operand)
 	def create_str_helper(self, s:str) -> TV:
-		idx = len(self.strings)
-		self.strings.append(s)
+		idx = self.strings.setdefault(s, len(self.strings))
 		l = len(s)
 		return TV(types.STR,f"<{{i64 {l}, [0 x i8]* bitcast([{l} x i8]* {self.module.str_llvmid(idx)} to [0 x i8]*)}}>")
+	@dispatch.handles(nodes.Int)
 	def visit_int(self, node:nodes.Int) -> TV:
 		return TV(types.INT, node.token.operand)
+	@dispatch.handles(nodes.Short)
 	def visit_short(self, node:nodes.Short) -> TV:
 		return TV(types.SHORT, node.token.operand)
+	@dispatch.handles(nodes.CharStr)
 	def visit_char_str(self, node:nodes.CharStr) -> TV:
 		return TV(types.CHAR, f"{ord(node.token.operand)}")
+	@dispatch.handles(nodes.CharNum)
 	def visit_char_num(self, node:nodes.CharNum) -> TV:
 		return TV(types.CHAR, f"{node.token.operand}")
+	@dispatch.handles(nodes.Template)
 	def visit_template(self, node:nodes.Template) -> TV:
-		strings_array_ptr = self.allocate_type_helper(types.STR, f"template_strings_array.{node.uid}", TV(types.INT, f"{len(node.strings)}"))
+		#default formatter only reads both tables during the call, so they live on the stack, other formatters can keep them
+		on_stack = node.formatter is None and self.allocas is not None
+		strings_array_ptr = self.allocate_type_helper(types.STR, f"template_strings_array.{node.uid}", TV(types.INT, f"{len(node.strings)}"), on_stack)
 		assert isinstance(strings_array_ptr.typ,types.Ptr)
 		for idx,va in enumerate(node.strings):
-			a = self.create_str_helper(va.operand)
+			string = self.create_str_helper(va.operand)
 			self.text += f"""\
 	%template.strings.{idx}.{node.uid} = getelementptr {strings_array_ptr.typ.pointed.llvm}, {strings_array_ptr}, i32 0, i64 {idx}
-	store {a}, {types.Ptr(types.STR).llvm} %template.strings.{idx}.{node.uid}
+	store {string}, {types.Ptr(types.STR).llvm} %template.strings.{idx}.{node.uid}
 """
-		values_array_ptr = self.allocate_type_helper(types.STR, f"template_values_array.{node.uid}", TV(types.INT, f"{len(node.strings)}"))
+		values_array_ptr = self.allocate_type_helper(types.STR, f"template_values_array.{node.uid}", TV(types.INT, f"{len(node.strings)}"), on_stack)
 		assert isinstance(values_array_ptr.typ,types.Ptr)
 		for idx,val in enumerate(node.values):
 			value = self.visit(val)
 			typ = value.typ
-			a = self.create_str_helper(f"<'{typ}' object>")
+			a:TV|None = None
 			if isinstance(typ,types.Ptr):
 				if isinstance(typ.pointed,types.Struct|types.Enum):
 					magic_node = typ.pointed.get_magic('str')
@@ -198,6 +252,8 @@ return:
 				converter = self.names.get(BOOL_TO_STR_CONVERTER)
 				assert converter is not None, "bool to str converter not found"
 				a = self.call_helper(converter, [value], f"template_value_bool.{idx}.{node.uid}")
+			if a is None:
+				a = self.create_str_helper(f"<'{typ}' object>")
 			self.text += f"""\
 	%template.values.{idx}.{node.uid} = getelementptr {values_array_ptr.typ.pointed.llvm}, {values_array_ptr}, i32 0, i64 {idx}
 	store {a}, {types.Ptr(types.STR).llvm} %template.values.{idx}.{node.uid}
@@ -209,23 +265,37 @@ return:
 			formatter = self.names.get(DEFAULT_TEMPLATE_STRING_FORMATTER)
 		assert formatter is not None, 'DEFAULT_TEMPLATE_STRING_FORMATTER was not imported from sys.builtin'
 		return self.call_helper(formatter, args, f"template.formatter.{node.uid}")
+	def short_circuit_helper(self, node:nodes.BinaryOperation, left:TV) -> TV:
+		"""`and`/`or` on bools: right operand is evaluated only if left one did not decide the result"""
+		is_and = node.operation.equals(TT.KEYWORD,'and')
+		right_label, exit_label = f"short_circuit_right.{node.uid}", f"short_circuit_exit.{node.uid}"
+		self.text += f"""\
+	br label %short_circuit_left.{node.uid}
+short_circuit_left.{node.uid}:
+	br {left}, label %{right_label if is_and else exit_label}, label %{exit_label if is_and else right_label}
+{right_label}:
+"""
+		right = self.visit(node.right)
+		self.text += f"""\
+	br label %short_circuit_right_end.{node.uid}
+short_circuit_right_end.{node.uid}:
+	br label %{exit_label}
+{exit_label}:
+	%binary_operation.{node.uid} = phi {types.BOOL.llvm} [{'false' if is_and else 'true'}, %short_circuit_left.{node.uid}], [{right.val}, %short_circuit_right_end.{node.uid}]
+"""
+		return TV(types.BOOL, f"%binary_operation.{node.uid}")
+	@dispatch.handles(nodes.BinaryOperation)
 	def visit_bin_exp(self, node:nodes.BinaryOperation) -> TV:
 		left = self.visit(node.left)
+		op = node.operation
+		if (op.equals(TT.KEYWORD,'and') or op.equals(TT.KEYWORD,'or')) and left.typ == types.BOOL:
+			return self.short_circuit_helper(node, left)
 		right = self.visit(node.right)
 		lr = left.typ,right.typ
 		lv = left.val
 		rv = right.val
 
-		op = node.operation
-		if op.equals(TT.KEYWORD,'and') and lr == (types.BOOL,types.BOOL):
-			self.text +=f"""\
-	%binary_operation.{node.uid} = and {types.BOOL.llvm} {lv}, {rv}
-"""
-		elif op.equals(TT.KEYWORD,'or' ) and lr == (types.BOOL,types.BOOL):
-			self.text +=f"""\
-	%binary_operation.{node.uid} = or { types.BOOL.llvm} {lv}, {rv}
-"""
-		elif op.equals(TT.KEYWORD,'xor') and lr == (types.BOOL,types.BOOL):
+		if op.equals(TT.KEYWORD,'xor') and lr == (types.BOOL,types.BOOL):
 			self.text +=f"""\
 	%binary_operation.{node.uid} = xor { types.BOOL.llvm} {lv}, {rv}
 """
@@ -284,14 +354,19 @@ TT.NOT_EQUALS:    f"icmp ne",
 }[node.operation.typ] } {left.typ.llvm_item_id} %binary_operation.enum_left.{node.uid}, %binary_operation.enum_right.{node.uid}
 """
 		return TV(node.typ(left.typ, right.typ, self.config), f"%binary_operation.{node.uid}") # return if not already
+	@dispatch.handles(nodes.ExprStatement)
 	def visit_expr_state(self, node:nodes.ExprStatement) -> TV:
 		self.visit(node.value)
 		return TV()
+	@dispatch.handles(nodes.ReferTo)
 	def visit_refer(self, node:nodes.ReferTo) -> TV:
 		tv = self.names.get(node.name.operand)
 		assert tv is not None, f"{node.name.place} name '{node.name.operand}' is not defined (tc is broken) {node}"
 		return tv
-	def allocate_type_helper(self, typ:types.Type, uid:str, times:TV|None = None) -> TV:
+	def on_stack(self, node:Node, typ:types.Type) -> bool:
+		"""variable, created by `node`, does not escape current function and is small, so it can be an alloca"""
+		return self.allocas is not None and node.uid in self.stack_variables and typ != types.VOID and isinstance(typ, (types.Primitive, types.Ptr, types.Fun, types.Enum))
+	def allocate_type_helper(self, typ:types.Type, uid:str, times:TV|None = None, on_stack:bool = False) -> TV:
 		if times is None:
 			tv = TV(types.Ptr(typ), f"%new_variable.{uid}")
 			time = TV(types.INT,'1')
@@ -300,6 +375,17 @@ TT.NOT_EQUALS:    f"icmp ne",
 			time = times
 		if typ == types.VOID:
 			return tv
+		if on_stack:
+			assert self.allocas is not None, "only variables of a function can be on stack"
+			if times is None:
+				self.allocas += f"\t%new_variable.{uid} = alloca {typ.llvm}\n"#in the entry block, so mem2reg can turn it into registers
+			else:
+				assert times.val.isdigit(), "only arrays of constant length can be on stack"
+				self.allocas += f"""\
+	%stack_array.{uid} = alloca {typ.llvm}, {times}
+	%new_variable.{uid} = bitcast {types.Ptr(typ).llvm} %stack_array.{uid} to {tv.typ.llvm}
+"""
+			return tv
 		self.text += f"""\
 	%size_of_new_variable_as_a_ptr.{uid} = getelementptr {typ.llvm}, {types.Ptr(typ).llvm} null, {time}
 	%size_of_new_variable.{uid} = ptrtoint {types.Ptr(typ).llvm} %size_of_new_variable_as_a_ptr.{uid} to i64
@@ -307,18 +393,26 @@ TT.NOT_EQUALS:    f"icmp ne",
 	%new_variable.{uid} = bitcast i8* %untyped_ptr_to_new_variable.{uid} to {tv.typ.llvm}
 """
 		return tv
+	@dispatch.handles(nodes.Declaration)
 	def visit_declaration(self, node:nodes.Declaration) -> TV:
 		time:TV|None = None
 		if node.times is not None:
 			time = self.visit(node.times)
-		self.names[node.var.name.operand] = self.allocate_type_helper(self.check(node.var.typ),f"declaration.{node.uid}", time)
+		typ = self.check(node.var.typ)
+		on_stack = time is None and self.on_stack(node, typ)
+		space = self.allocate_type_helper(typ,f"declaration.{node.uid}", time, on_stack)
+		if on_stack:
+			self.text += f"\tstore {typ.llvm} zeroinitializer, {space}\n"#GC_malloc gives zeroed memory, alloca does not
+		self.names[node.var.name.operand] = space
 		return TV()
+	@dispatch.handles(nodes.Assignment)
 	def visit_assignment(self, node:nodes.Assignment) -> TV:
 		val = self.visit(node.value) # get a value to store
-		space = self.allocate_type_helper(val.typ,f"assignment.{node.uid}")
+		space = self.allocate_type_helper(val.typ,f"assignment.{node.uid}", on_stack=self.on_stack(node, val.typ))
 		self.names[node.var.name.operand] = space
 		self.store_type_helper(space, val)
 		return TV()
+	@dispatch.handles(nodes.Save)
 	def visit_save(self, node:nodes.Save) -> TV:
 		space = self.visit(node.space)
 		value = self.visit(node.value)
@@ -328,15 +422,17 @@ TT.NOT_EQUALS:    f"icmp ne",
 		if space.typ == types.VOID:
 			return
 		self.text += f"\tstore {value}, {space}\n"
+	@dispatch.handles(nodes.VariableSave)
 	def visit_variable_save(self, node:nodes.VariableSave) -> TV:
 		space = self.names.get(node.space.operand)
 		value = self.visit(node.value)
 		if space is None:
-			space = self.allocate_type_helper(value.typ,f"variable_save.{node.uid}")
+			space = self.allocate_type_helper(value.typ,f"variable_save.{node.uid}", on_stack=self.on_stack(node, value.typ))
 			self.names[node.space.operand] = space
 		self.store_type_helper(space,value)
 		return TV()
 
+	@dispatch.handles(nodes.If)
 	def visit_if(self, node:nodes.If) -> TV:
 		cond = self.visit(node.condition)
 		self.text+=f"""\
@@ -355,6 +451,7 @@ if_false_branch.{node.uid}:
 if_exit_branch.{node.uid}:
 """
 		return TV()
+	@dispatch.handles(nodes.While)
 	def visit_while(self, node:nodes.While) -> TV:
 		self.text+=f"""\
 	br label %while_condition.{node.uid}
@@ -371,6 +468,7 @@ while_body.{node.uid}:
 while_exit_branch.{node.uid}:
 """
 		return TV()
+	@dispatch.handles(nodes.Constant)
 	def visit_constant(self, node:nodes.Constant) -> TV:
 		constants = {
 			'False':TV(types.BOOL,'false'),
@@ -391,6 +489,7 @@ while_exit_branch.{node.uid}:
 		implementation = constants.get(node.name.operand)
 		assert implementation is not None, f"Constant {node.name} is not implemented yet"
 		return implementation
+	@dispatch.handles(nodes.UnaryExpression)
 	def visit_unary_exp(self, node:nodes.UnaryExpression) -> TV:
 		val = self.visit(node.left)
 		l = val.typ
@@ -407,22 +506,29 @@ while_exit_branch.{node.uid}:
 	%unary_operation.{node.uid} = {i}
 """
 		return TV(node.typ(l, self.config),f"%unary_operation.{node.uid}")
+	@dispatch.handles(nodes.Var)
 	def visit_var(self, node:nodes.Var) -> TV:
 		return TV()
+	@dispatch.handles(nodes.Const)
 	def visit_const(self, node:nodes.Const) -> TV:
 		return TV()
+	@dispatch.handles(nodes.Struct)
 	def visit_struct(self, node:nodes.Struct) -> TV:
 		for fun in node.funs:
 			self.visit_fun(fun)
 		return TV()
+	@dispatch.handles(nodes.Mix)
 	def visit_mix(self,node:nodes.Mix) -> TV:
 		return TV()
+	@dispatch.handles(nodes.Use)
 	def visit_use(self,node:nodes.Use) -> TV:
 		return TV()
+	@dispatch.handles(nodes.Set)
 	def visit_set(self,node:nodes.Set) -> TV:
 		value = self.visit(node.value)
 		self.names[node.name.operand] = value
 		return TV()
+	@dispatch.handles(nodes.Return)
 	def visit_return(self, node:nodes.Return) -> TV:
 		rv = self.visit(node.value)
 		if rv.typ != types.VOID:
@@ -431,6 +537,7 @@ while_exit_branch.{node.uid}:
 """
 		self.text+= f"	br label %return\n"
 		return TV()
+	@dispatch.handles(nodes.Dot)
 	def visit_dot(self, node:nodes.Dot) -> TV:
 		origin = self.visit(node.origin)
 		if isinstance(origin.typ,types.Module):
@@ -467,6 +574,7 @@ while_exit_branch.{node.uid}:
 			return TV(types.BoundFun(fun, origin.typ, origin.val), llvmid)
 		else:
 			assert False, f'unreachable, unknown {type(origin.typ.pointed) = }'
+	@dispatch.handles(nodes.Subscript)
 	def visit_subscript(self, node:nodes.Subscript) -> TV:
 		origin = self.visit(node.origin)
 		subscripts = [self.visit(subscript) for subscript in node.subscripts]
@@ -495,6 +603,7 @@ while_exit_branch.{node.uid}:
 			return self.call_helper(TV(magic, llvmid), [origin]+subscripts, f"struct_subscript_result.{node.uid}")
 		else:
 			assert False, 'unreachable'
+	@dispatch.handles(nodes.StrCast)
 	def visit_string_cast(self, node:nodes.StrCast) -> TV:
 		length = self.visit(node.length)
 		pointer = self.visit(node.pointer)
@@ -505,6 +614,7 @@ while_exit_branch.{node.uid}:
 	%string_cast_result.{node.uid} = insertvalue {types.STR.llvm} %string_cast_half_baked.{node.uid}, {pointer}, 1
 """
 		return TV(types.STR,f"%string_cast_result.{node.uid}")
+	@dispatch.handles(nodes.Cast)
 	def visit_cast(self, node:nodes.Cast) -> TV:
 		val = self.visit(node.value)
 		nt = self.check(node.typ)
@@ -536,22 +646,27 @@ while_exit_branch.{node.uid}:
 	%cast_result.{node.uid} = {op} {val} to {nt.llvm}
 """
 		return TV(nt,f'%cast_result.{node.uid}')
+	@dispatch.handles(nodes.Enum)
 	def visit_enum(self, node:nodes.Enum) -> TV:
 		for fun in node.funs:
 			self.visit(fun)
 		return TV()
+	@type_dispatch.handles(nodes.TypePointer)
 	def check_type_pointer(self, node:nodes.TypePointer) -> Type:
 		pointed = self.check(node.pointed)
 		return types.Ptr(pointed)
+	@type_dispatch.handles(nodes.TypeArray)
 	def check_type_array(self, node:nodes.TypeArray) -> Type:
 		element = self.check(node.typ)
 		return types.Array(element, node.size)
+	@type_dispatch.handles(nodes.TypeFun)
 	def check_type_fun(self, node:nodes.TypeFun) -> Type:
 		args = tuple(self.check(arg) for arg in node.args)
 		return_type:Type = types.VOID
 		if node.return_type is not None:
 			return_type = self.check(node.return_type)
 		return types.Fun(args, return_type)
+	@type_dispatch.handles(nodes.TypeReference)
 	def check_type_reference(self, node:nodes.TypeReference) -> Type:
 		name = node.ref.operand
 		if name == 'bool': return types.BOOL
@@ -565,36 +680,49 @@ while_exit_branch.{node.uid}:
 		assert typ is not None
 		return typ
 	def check(self, node:Node) -> Type:
-		if type(node) == nodes.TypeArray        : return self.check_type_array     (node)
-		if type(node) == nodes.TypeFun          : return self.check_type_fun       (node)
-		if type(node) == nodes.TypePointer      : return self.check_type_pointer   (node)
-		if type(node) == nodes.TypeReference    : return self.check_type_reference (node)
-		assert False, f"Unreachable, unknown type {type(node)=}"
+		return self.type_dispatch.handler(node)(self, node)
+	@dispatch.handles(nodes.TypeDefinition)
 	def visit_type_definition(self, node:nodes.TypeDefinition) -> TV:
 		self.type_names[node.name.operand] = self.check(node.typ)
 		return TV()
+	@dispatch.handles(nodes.Match)
 	def visit_match(self, node:nodes.Match) -> TV:
 		value = self.visit(node.value)
 		if isinstance(value.typ, types.Enum):
+			enum = value.typ
+			cases = [(case, *node.lookup_enum(enum, case, self.config)) for case in node.cases]
+			if any(typ != types.VOID and typ.llvm != enum.llvm_max_item_element for _, _, typ in cases):
+				assert self.allocas is not None, "match is only inside of functions"
+				self.allocas += f"\t%match.payload.{node.uid} = alloca {enum.llvm_max_item}\n"#in the entry block, so a match in a loop does not grow the stack and mem2reg can remove it
+				self.text+=f"""\
+	%match.payload.value.{node.uid} = extractvalue {value}, 1
+	store {enum.llvm_max_item} %match.payload.value.{node.uid}, {enum.llvm_max_item}* %match.payload.{node.uid}
+"""
 			self.text+=f"""\
-	%match.switched.value = extractvalue {value}, 0
-	switch {value.typ.llvm_item_id} %match.switched.value, label %match_default_branch.{node.uid} [{' '.join(
-		f'{value.typ.llvm_item_id} {node.lookup_enum(value.typ, case, self.config)[0]}, label %match_branch_{case.uid}.{node.uid}' for case in node.cases)}]
+	%match.item_id.{node.uid} = extractvalue {value}, 0
+	switch {enum.llvm_item_id} %match.item_id.{node.uid}, label %match_default_branch.{node.uid} [{' '.join(
+		f'{enum.llvm_item_id} {idx}, label %match_branch_{case.uid}.{node.uid}' for case, idx, _ in cases)}]
 """
-			for case in node.cases:
-				names_before = self.names.copy()
-				_, typ = node.lookup_enum(value.typ, case, self.config)
+			for case, _, typ in cases:
+				self.names.enter()
 				self.text+=f"""\
 match_branch_{case.uid}.{node.uid}:
-	%match.enum.0.{case.uid}.{node.uid} = alloca {value.typ.llvm_max_item}
-	%match.enum.1.{case.uid}.{node.uid} = extractvalue {value}, 1
-	store {value.typ.llvm_max_item} %match.enum.1.{case.uid}.{node.uid}, {value.typ.llvm_max_item}* %match.enum.0.{case.uid}.{node.uid}
-	%match.enum.2.{case.uid}.{node.uid} = bitcast {value.typ.llvm_max_item}* %match.enum.0.{case.uid}.{node.uid} to {types.Ptr(typ).llvm}
-	%match.enum.value.{case.uid}.{node.uid} = load {typ.llvm}, {types.Ptr(typ).llvm} %match.enum.2.{case.uid}.{node.uid}
 """
-				self.names[node.match_as.operand] = TV(typ, f"%match.enum.value.{case.uid}.{node.uid}")
+				if typ == types.VOID:
+					self.names[node.match_as.operand] = TV(typ, '')
+				elif typ.llvm == enum.llvm_max_item_element:
+					self.text+=f"""\
+	%match.enum.value.{case.uid}.{node.uid} = extractvalue {value}, 1, 0
+"""
+					self.names[node.match_as.operand] = TV(typ, f"%match.enum.value.{case.uid}.{node.uid}")
+				else:
+					self.text+=f"""\
+	%match.enum.ptr.{case.uid}.{node.uid} = bitcast {enum.llvm_max_item}* %match.payload.{node.uid} to {types.Ptr(typ).llvm}
+	%match.enum.value.{case.uid}.{node.uid} = load {typ.llvm}, {types.Ptr(typ).llvm} %match.enum.ptr.{case.uid}.{node.uid}
+"""
+					self.names[node.match_as.operand] = TV(typ, f"%match.enum.value.{case.uid}.{node.uid}")
 				self.visit(case.body)
-				self.names = names_before
+				self.names.leave()
 				self.text+=f"""\
 	br label %match_exit_branch.{node.uid}
 """
@@ -611,58 +739,81 @@ match_exit_branch.{node.uid}:
 			assert False, f"match type {value.typ} is no implemented"
 		return TV()
 	def visit(self, node:Node) -> TV:
-		if type(node) == nodes.Assignment       : return self.visit_assignment      (node)
-		if type(node) == nodes.BinaryOperation  : return self.visit_bin_exp         (node)
-		if type(node) == nodes.Call             : return self.visit_call            (node)
-		if type(node) == nodes.Cast             : return self.visit_cast            (node)
-		if type(node) == nodes.CharNum          : return self.visit_char_num        (node)
-		if type(node) == nodes.CharStr          : return self.visit_char_str        (node)
-		if type(node) == nodes.Code             : return self.visit_code            (node)
-		if type(node) == nodes.Const            : return self.visit_const           (node)
-		if type(node) == nodes.Constant         : return self.visit_constant        (node)
-		if type(node) == nodes.Declaration      : return self.visit_declaration     (node)
-		if type(node) == nodes.Dot              : return self.visit_dot             (node)
-		if type(node) == nodes.Enum             : return self.visit_enum            (node)
-		if type(node) == nodes.ExprStatement    : return self.visit_expr_state      (node)
-		if type(node) == nodes.FromImport       : return self.visit_from_import     (node)
-		if type(node) == nodes.Fun              : return self.visit_fun             (node)
-		if type(node) == nodes.If               : return self.visit_if              (node)
-		if type(node) == nodes.Import           : return self.visit_import          (node)
-		if type(node) == nodes.Int              : return self.visit_int             (node)
-		if type(node) == nodes.Match            : return self.visit_match           (node)
-		if type(node) == nodes.Mix              : return self.visit_mix             (node)
-		if type(node) == nodes.ReferTo          : return self.visit_refer           (node)
-		if type(node) == nodes.Return           : return self.visit_return          (node)
-		if type(node) == nodes.Save             : return self.visit_save            (node)
-		if type(node) == nodes.Set              : return self.visit_set             (node)
-		if type(node) == nodes.Short            : return self.visit_short           (node)
-		if type(node) == nodes.Str              : return self.visit_str             (node)
-		if type(node) == nodes.StrCast          : return self.visit_string_cast     (node)
-		if type(node) == nodes.Struct           : return self.visit_struct          (node)
-		if type(node) == nodes.Subscript        : return self.visit_subscript       (node)
-		if type(node) == nodes.Template         : return self.visit_template        (node)
-		if type(node) == nodes.TypeDefinition   : return self.visit_type_definition (node)
-		if type(node) == nodes.UnaryExpression  : return self.visit_unary_exp       (node)
-		if type(node) == nodes.Use              : return self.visit_use             (node)
-		if type(node) == nodes.Var              : return self.visit_var             (node)
-		if type(node) == nodes.VariableSave     : return self.visit_variable_save   (node)
-		if type(node) == nodes.While            : return self.visit_while           (node)
-
-		assert False, f'Unreachable, unknown {type(node)=}'
+		return self.dispatch.handler(node)(self, node)
+	def link_name(self, name:str) -> str:
+		return f'@"{self.module.path}::{name}"'
+	def export_fun(self, llvmid:str, name:str, typ:types.Fun) -> None:
+		link_name = self.link_name(name)
+		self.symbols[llvmid] = Symbol(link_name, f"declare {typ.return_type.llvm} {link_name}({', '.join(arg.llvm for arg in typ.arg_types)})\n")
+	def generate_module(self, module:nodes.Module, setup:Emitter) -> 'GenerateAssembly':
+		"""generator of an imported module, generating it if it was not generated yet"""
+		gen = self.generated.get(module.path)
+		if gen is None:
+			self.text+= f"\tcall void {module.llvmid}()\n"
+			gen = GenerateAssembly(module, self.config, self.generated)
+			if not self.config.separate:
+				setup+=gen.text
+			self.generated[module.path] = gen
+		self.modules[module.uid] = gen
+		return gen
+	def generators(self) -> 'dict[str,GenerateAssembly]':
+		"""generators of this module and of every module it imports"""
+		gens:dict[str,GenerateAssembly] = {}
+		def collect(gen:GenerateAssembly) -> None:
+			if gen.module.path not in gens:
+				gens[gen.module.path] = gen
+				for imported in gen.modules.values():
+					collect(imported)
+		collect(self)
+		return gens
+	def ir_lines(self) -> int:
+		"""lines of llvm ir of this module, without ir of modules it imports"""
+		imported = {id(gen.text) for gen in self.generators().values() if gen is not self}
+		def count(emitter:Emitter) -> int:
+			lines = 0
+			for chunk in emitter.chunks:
+				if isinstance(chunk, str):
+					lines += chunk.count('\n')
+				elif id(chunk) not in imported:
+					lines += count(chunk)
+			return lines
+		return count(self.text)
+	def separate_modules(self) -> 'list[tuple[nodes.Module, Emitter]]':
+		"""every module of the program as its own llvm module (with `--separate`).
+		globals, that are used by other modules, get their `Symbol.name` and are declared where they are used,
+		named types of all modules are defined in each one"""
+		assert self.config.separate, "modules were generated as one llvm module"
+		gens = self.generators()
+		symbols = {llvmid:symbol for gen in gens.values() for llvmid, symbol in gen.symbols.items()}
+		named_types = Emitter()
+		for gen in gens.values():
+			named_types += gen.types
+		units = []
+		for gen in gens.values():
+			declarations:dict[str,str] = {}
+			def rename(match:'re.Match[str]') -> str:
+				symbol = symbols.get(match[0])
+				if symbol is None:
+					return match[0]
+				if match[0] not in gen.symbols:
+					declarations[symbol.name] = symbol.declaration
+				return symbol.name
+			text = Emitter()
+			text += named_types
+			for chunk in gen.text:
+				text += GLOBAL_NAME.sub(rename, chunk)
+			text += ''.join(declarations.values())
+			units.append((gen.module, text))
+		return units
 	def generate_assembly(self) -> None:
-		setup =''
-		self.text = f"""
-define private void {self.module.llvmid}() {{
+		setup = Emitter()
+		link_name = self.link_name('')
+		self.symbols[self.module.llvmid] = Symbol(link_name, f"declare void {link_name}()\n")
+		self.text += f"""
+define {self.linkage} void {self.module.llvmid}() {{
 """
 		if self.module.builtin_module is not None:
-			if self.module.builtin_module.path not in imported_modules_paths:
-				self.text+= f"\tcall void {self.module.builtin_module.llvmid}()\n"
-				gen = GenerateAssembly(self.module.builtin_module,self.config)
-				setup+=gen.text
-				imported_modules_paths[self.module.builtin_module.path] = gen
-			else:
-				gen = imported_modules_paths[self.module.builtin_module.path]
-			self.modules[self.module.builtin_module.uid] = gen
+			gen = self.generate_module(self.module.builtin_module, setup)
 			for name in BUILTIN_WORDS:
 				typ = gen.names.get(name)
 				type_definition = gen.type_names.get(name)
@@ -674,24 +825,10 @@ define private void {self.module.llvmid}() {{
 					self.type_names[name] = type_definition
 		for top in self.module.tops:
 			if isinstance(top,nodes.Import):
-				if top.module.path not in imported_modules_paths:
-					self.text+= f"\tcall void {top.module.llvmid}()\n"
-					gen = GenerateAssembly(top.module,self.config)
-					setup+=gen.text
-					imported_modules_paths[top.module.path] = gen
-				else:
-					gen = imported_modules_paths[top.module.path]
-				self.modules[top.module.uid] = gen
+				self.generate_module(top.module, setup)
 				self.names[top.name] = TV(types.Module(top.module.uid,top.module.path))
 			elif isinstance(top,nodes.FromImport):
-				if top.module.path not in imported_modules_paths:
-					self.text+= f"\tcall void {top.module.llvmid}()\n"
-					gen = GenerateAssembly(top.module,self.config)
-					setup+=gen.text
-					imported_modules_paths[top.module.path] = gen
-				else:
-					gen = imported_modules_paths[top.module.path]
-				self.modules[top.module.uid] = gen
+				gen = self.generate_module(top.module, setup)
 				for nam in top.imported_names:
 					name = nam.operand
 					type_definition = gen.type_names.get(name)
@@ -703,9 +840,12 @@ define private void {self.module.llvmid}() {{
 						self.type_names[name] = type_definition
 			elif isinstance(top,nodes.Fun):
 					self.names[top.name.operand] = TV(top.typ(self.check),top.llvmid)
+					self.export_fun(top.llvmid, top.name.operand, top.typ(self.check))
 			elif isinstance(top,nodes.Var):
-				self.names[top.name.operand] = TV(types.Ptr(self.check(top.typ)),f'@{top.name.operand}')
-				setup += f"@{top.name.operand} = private global {self.check(top.typ).llvm} undef\n"
+				var = self.link_name(top.name.operand)
+				self.names[top.name.operand] = TV(types.Ptr(self.check(top.typ)),var)
+				setup += f"{var} = {self.linkage} global {self.check(top.typ).llvm} undef\n"
+				self.symbols[var] = Symbol(var, f"{var} = external global {self.check(top.typ).llvm}\n")
 			elif isinstance(top,nodes.Const):
 				self.names[top.name.operand] = TV(types.INT,f"{top.value}")
 			elif isinstance(top,nodes.Struct):
@@ -715,13 +855,19 @@ define private void {self.module.llvmid}() {{
 				struct.__dict__ = actual_s_type.__dict__#FIXME
 				del actual_s_type
 
-				sk = top.to_struct_kind(self.check)
+				sk = top.to_struct_kind(self.check, struct)
 				self.names[top.name.operand] = TV(sk, sk.llvmid)
-				setup += f"""\
+				self.types += f"""\
 	{struct.llvm} = type {{{', '.join(self.check(var.typ).llvm for var in top.variables)}}}
 	{sk.llvm} = type {{{', '.join(i.llvm for _,i in sk.statics)}}}
-	{sk.llvmid} = private global {sk.llvm} undef
 """
+				setup += f"""\
+	{sk.llvmid} = {self.linkage} global {sk.llvm} undef
+"""
+				link_name = self.link_name(top.name.operand)
+				self.symbols[sk.llvmid] = Symbol(link_name, f"{link_name} = external global {sk.llvm}\n")
+				for fun in top.funs:
+					self.export_fun(fun.llvmid, f"{top.name.operand}.{fun.name.operand}", fun.typ(self.check))
 				u = f"{top.uid}"
 				for idx,i in enumerate(top.static_variables):
 					value=self.visit(i.value)
@@ -737,14 +883,17 @@ define private void {self.module.llvmid}() {{
 				enum.__dict__ = actual_enum_type.__dict__#FIXME
 				del actual_enum_type
 
-				ek = top.to_enum_kind(self.check)
+				ek = top.to_enum_kind(enum)
 				self.names[top.name.operand] = TV(ek)
-				setup += f"""\
+				self.types += f"""\
 	{enum.llvm} = type {{{enum.llvm_item_id}, {enum.llvm_max_item}}}
 """
+				for fun in top.funs:
+					self.export_fun(fun.llvmid, f"{top.name.operand}.{fun.name.operand}", fun.typ(self.check))
 				for idx, (name, ty) in enumerate(enum.typed_items):
+					self.export_fun(ek.llvmid_of_type_function(idx), f"{top.name.operand}.{name}", types.Fun((ty,), enum))
 					setup += f"""\
-define private {enum.llvm} {ek.llvmid_of_type_function(idx)}({ty.llvm} %0) {{
+define {self.linkage} {enum.llvm} {ek.llvmid_of_type_function(idx)}({ty.llvm} %0) {{
 	%2 = alloca {enum.llvm_max_item}
 	store {enum.llvm_max_item} zeroinitializer, {enum.llvm_max_item}* %2
 	%3 = bitcast {enum.llvm_max_item}* %2 to {ty.llvm}*
@@ -759,21 +908,34 @@ define private {enum.llvm} {ek.llvmid_of_type_function(idx)}({ty.llvm} %0) {{
 				self.names[top.name.operand] = TV(MixTypeTv([self.visit(fun_ref) for fun_ref in top.funs],top.name.operand))
 			elif isinstance(top,nodes.Use):
 				self.names[top.as_name.operand] = TV(types.Fun(tuple(self.check(arg) for arg in top.arg_types),self.check(top.return_type)),f'@{top.name}')
-				setup+=f"declare {self.check(top.return_type).llvm} @{top.name}({', '.join(self.check(arg).llvm for arg in top.arg_types)})\n"
+				declaration = f"declare {self.check(top.return_type).llvm} @{top.name}({', '.join(self.check(arg).llvm for arg in top.arg_types)})\n"
+				setup += declaration
+				self.symbols[f'@{top.name}'] = Symbol(f'@{top.name}', declaration)
 		self.text+="\tret void\n}"
-		text = ''
+		text = Emitter()
 		if self.module.path == MAIN_MODULE_PATH:
 			text += f"""\
 ; Assembly generated by jararaca compiler github.com/izumrudik/jararaca
-@ARGV = private global {types.Ptr(types.Array(types.Ptr(types.Array(types.CHAR)))).llvm} undef
-@ARGC = private global {types.INT.llvm} undef
+@ARGV = {self.linkage} global {types.Ptr(types.Array(types.Ptr(types.Array(types.CHAR)))).llvm} undef
+@ARGC = {self.linkage} global {types.INT.llvm} undef
+declare void @GC_init()
+declare noalias i8* @GC_malloc(i64 noundef)
+"""
+		elif self.config.separate:#defined by the main module
+			text += f"""\
+@ARGV = external global {types.Ptr(types.Array(types.Ptr(types.Array(types.CHAR)))).llvm}
+@ARGC = external global {types.INT.llvm}
 declare void @GC_init()
 declare noalias i8* @GC_malloc(i64 noundef)
 """
 		for top in self.module.tops:
 			self.visit(top)
-		for idx, string in enumerate(self.strings):
+		for string, idx in self.strings.items():
 			l = len(string)
 			string = ''.join('\\'+('0'+hex(ord(c))[2:])[-2:] for c in string)
-			text += f"{self.module.str_llvmid(idx)} = private constant [{l} x i8] c\"{string}\"\n"
-		self.text = text+setup+self.text
+			text += f"{self.module.str_llvmid(idx)} = private unnamed_addr constant [{l} x i8] c\"{string}\"\n"
+		if not self.config.separate:#with separate modules, types of all modules are added to each one
+			text += self.types
+		text += setup
+		text += self.text
+		self.text = text
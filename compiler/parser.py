@@ -1,28 +1,26 @@
 import os
 import sys
-from typing import Callable, TypeVar
+from typing import Callable, Iterable, Iterator, TypeVar
 
 from .primitives import nodes, Node, TT, Token, Config, Type, types, JARARACA_PATH, BUILTIN_WORDS, ET, Place, MAIN_MODULE_PATH
 from .utils import extract_module_from_file_path
 class Parser:
-	__slots__ = ('tokens', 'config', 'idx', 'parsed_tops', 'module_path', 'builtin_module')
-	def __init__(self, tokens:list[Token], config:Config, module_path:str|None = None) -> None:
-		self.tokens     :list[Token] = tokens
-		self.config     :Config      = config
-		self.idx        :int         = 0
-		self.parsed_tops:list[Node]  = []
-		self.module_path:str         = MAIN_MODULE_PATH if module_path is None else module_path
-		self.builtin_module          = extract_module_from_file_path(os.path.join(JARARACA_PATH,'std','builtin.ja'),self.config,'std.builtin', None) if self.module_path != 'std.builtin' else None
+	__slots__ = ('tokens', 'config', 'current', 'next', 'parsed_tops', 'module_path', 'builtin_module')
+	def __init__(self, tokens:Iterable[Token], config:Config, module_path:str|None = None) -> None:
+		self.tokens     :Iterator[Token] = iter(tokens)#consumed lazily, only current and next are kept
+		self.config     :Config          = config
+		self.current    :Token           = next(self.tokens)
+		self.next       :Token|None      = next(self.tokens, None)
+		self.parsed_tops:list[Node]      = []
+		self.module_path:str             = MAIN_MODULE_PATH if module_path is None else module_path
+		self.builtin_module              = extract_module_from_file_path(os.path.join(JARARACA_PATH,'std','builtin.ja'),self.config,'std.builtin', None) if self.module_path != 'std.builtin' else None
 	def adv(self) -> Token:
 		"""advance current word, and return what was current"""
 		ret = self.current
-		self.idx+=1
+		if self.next is not None:#the last token (EOF) stays current forever
+			self.current = self.next
+			self.next = next(self.tokens, None)
 		return ret
-	@property
-	def current(self) -> Token:
-		if self.idx >= len(self.tokens):
-			return self.tokens[-1]
-		return self.tokens[self.idx]
 	def parse(self) -> nodes.Module:
 		while self.current == TT.NEWLINE:self.adv() # skip newlines
 		while self.current.typ != TT.EOF:
@@ -350,11 +348,6 @@ class Parser:
 	def parse_code_block(self) -> nodes.Code:
 		block,place = self.block_parse_helper(self.parse_statement)
 		return nodes.Code(block,place)
-	@property
-	def next(self) -> 'Token | None':
-		if len(self.tokens)>self.idx+1:
-			return self.tokens[self.idx+1]
-		return None
 	def parse_statement(self) -> 'Node|None':
 		if self.next is not None:#variables
 			if self.next == TT.COLON:
@@ -1,10 +1,13 @@
-from .core import ET, Error, ErrorBin, ErrorExit, NEWLINE, Loc, Config, get_id, id_counter, process_cmd_args, extract_file_text_from_file_path, DIGITS, DIGITS_HEX, DIGITS_BIN, DIGITS_OCTAL, JARARACA_PATH, KEYWORDS, WHITESPACE, WORD_FIRST_CHAR_ALPHABET, WORD_ALPHABET, ESCAPE_TO_CHARS, CHARS_TO_ESCAPE, BUILTIN_WORDS, escape, pack_directory, DEFAULT_TEMPLATE_STRING_FORMATTER, CHAR_TO_STR_CONVERTER, INT_TO_STR_CONVERTER, Place, MAIN_MODULE_PATH, STRING_MULTIPLICATION, BOOL_TO_STR_CONVERTER
-from .token import TT, Token
+from .core import ET, Error, ErrorBin, ErrorExit, NEWLINE, Loc, Config, get_id, id_counter, process_cmd_args, extract_file_text_from_file_path, DIGITS, DIGITS_HEX, DIGITS_BIN, DIGITS_OCTAL, JARARACA_PATH, CACHE_PATH, KEYWORDS, WHITESPACE, WORD_FIRST_CHAR_ALPHABET, WORD_ALPHABET, ESCAPE_TO_CHARS, CHARS_TO_ESCAPE, BUILTIN_WORDS, escape, pack_directory, DEFAULT_TEMPLATE_STRING_FORMATTER, CHAR_TO_STR_CONVERTER, INT_TO_STR_CONVERTER, Place, MAIN_MODULE_PATH, STRING_MULTIPLICATION, BOOL_TO_STR_CONVERTER, OUTPUT_FLUSHER, tune_gc
+from .token import TT, Token, LineTable, TokenBuffer
+from .scope import Scope
+from .dispatch import Dispatch
+from .passes import Passes
 from . import nodes
 from .nodes import Node
 from . import type as types
 from .type import Type
-from .run import run_assembler, run_command, replace_self
+from .run import run_assembler, run_separate_assembler, run_command, replace_self
 __all__ = [
 	#constants
 	"DIGITS",
@@ -12,6 +15,7 @@ __all__ = [
 	"DIGITS_BIN",
 	"DIGITS_OCTAL",
 	"JARARACA_PATH",
+	"CACHE_PATH",
 	"KEYWORDS",
 	"WHITESPACE",
 	"WORD_FIRST_CHAR_ALPHABET",
@@ -26,13 +30,19 @@ __all__ = [
 	"MAIN_MODULE_PATH",
 	"STRING_MULTIPLICATION",
 	"BOOL_TO_STR_CONVERTER",
+	"OUTPUT_FLUSHER",
 	#classes
 	"Node",
 	"nodes",
 	"TT",
 	"Token",
+	"LineTable",
+	"TokenBuffer",
 	"Loc",
 	"Place",
+	"Scope",
+	"Dispatch",
+	"Passes",
 	"Config",
 	"ET",
 	"Error",
@@ -47,7 +57,9 @@ __all__ = [
 	#functions
 	"escape",
 	"pack_directory",
+	"tune_gc",
 	"run_assembler",
+	"run_separate_assembler",
 	"run_command",
 	"replace_self",
 	"process_cmd_args",
@@ -1,8 +1,10 @@
 from dataclasses import dataclass, field
 from enum import Enum, auto
+import gc
 import os
 import sys
 from typing import Callable, NoReturn
+from .passes import Passes
 import itertools
 __all__ = (
 	#constants
@@ -17,8 +19,10 @@ __all__ = (
 	"ESCAPE_TO_CHARS",
 	"INT_TO_STR_CONVERTER",
 	"JARARACA_PATH",
+	"CACHE_PATH",
 	"KEYWORDS",
 	"NEWLINE",
+	"OUTPUT_FLUSHER",
 	"STRING_MULTIPLICATION",
 	"WHITESPACE",
 	"WORD_ALPHABET",
@@ -31,6 +35,7 @@ __all__ = (
 	"process_cmd_args",
 	"extract_file_text_from_file_path",
 	"pack_directory",
+	"tune_gc",
 	#classes
 	"Loc",
 	"Config",
@@ -106,6 +111,7 @@ CHAR_TO_STR_CONVERTER = 'char_to_str'
 INT_TO_STR_CONVERTER = 'int_to_str'
 BOOL_TO_STR_CONVERTER = 'bool_to_str'
 STRING_MULTIPLICATION = 'string_multiplication_provider'
+OUTPUT_FLUSHER = 'flush'
 BUILTIN_WORDS = (
 	'ptr',
 	'len',
@@ -117,6 +123,8 @@ BUILTIN_WORDS = (
 	'nth_bit',
 	'exit',
 	'fputs',
+	'fflush',
+	'flush',
 	'put',
 	'eput',
 	'putn',
@@ -146,6 +154,7 @@ BUILTIN_WORDS = (
 )
 assert len(CHARS_TO_ESCAPE) == len(ESCAPE_TO_CHARS)
 JARARACA_PATH = os.environ['JARARACA_PATH']
+CACHE_PATH    = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'jararaca')
 NEWLINE       = '\n'
 WHITESPACE    = " \t\n\r\v\f\b\a"
 DIGITS        = "0123456789"
@@ -184,6 +193,24 @@ class Place:
 	def __str__(self) -> str:
 		assert self.start.file_path == self.end.file_path, "Mismatch between 'start' and 'end' locs in 'Place'"
 		return f"{self.start}"
+#frozen __init__ sets every field through object.__setattr__, that costs more, than the rest of lexing a token.
+#lexers make Locs and Places for every token with these, they set slots of a new object directly
+new_object = object.__new__
+set_file_path, set_idx, set_line, set_cols = (Loc.__dict__[name].__set__ for name in ('file_path', 'idx', 'line', 'cols'))
+set_start, set_end = (Place.__dict__[name].__set__ for name in ('start', 'end'))
+def make_loc(file_path:str, idx:int, line:int, cols:int) -> Loc:
+	loc = new_object(Loc)
+	set_file_path(loc, file_path)
+	set_idx(loc, idx)
+	set_line(loc, line)
+	set_cols(loc, cols)
+	return loc
+def make_place(start:Loc, end:Loc) -> Place:
+	"""`Place(start, end)` without the check of `__post_init__`, `start` and `end` have to be in one file"""
+	place = new_object(Place)
+	set_start(place, start)
+	set_end(place, end)
+	return place
 
 class ErrorExit(SystemExit):
 	pass
@@ -209,10 +236,12 @@ class ET(Enum):# Error Type
 	CLANG               = auto()
 	CMD_FILE            = auto()
 	CMD_FLAG            = auto()
+	CMD_JOBS            = auto()
 	CMD_OUTPUT_NAME     = auto()
 	CMD_O_NAME          = auto()
 	CMD_PACK_NAME       = auto()
 	CMD_SUBFLAG         = auto()
+	CMD_PASSES_NAME     = auto()
 	COLON               = auto()
 	CONST_NAME          = auto()
 	CTE_TERM            = auto()
@@ -254,6 +283,7 @@ class ET(Enum):# Error Type
 	INIT_MAGIC          = auto()
 	INIT_MAGIC_RET      = auto()
 	LLVM_DIS            = auto()
+	LLVM_LINK           = auto()
 	MAIN_ARGS           = auto()
 	MAIN_RETURN         = auto()
 	MATCH               = auto()
@@ -370,6 +400,10 @@ def pack_directory(directory:str) -> None:
 	path = os.path.join(JARARACA_PATH,'packets')
 	with open(os.path.join(path,name+'.link'), 'w', encoding='utf-8') as file:
 		file.write(os.path.abspath(directory))
+def tune_gc() -> None:
+	"""for entry points: tokens and nodes are made by millions and do not form cycles,
+	with default thresholds the collector walks all of them over and over while they are made"""
+	gc.set_threshold(200_000, 30, 30)
 
 
 def escape(string:str) -> str:
@@ -390,6 +424,10 @@ class Config:
 	optimization : str
 	argv         : list[str]
 	errors       : ErrorBin
+	cache        : bool
+	separate     : bool
+	jobs         : int
+	passes       : Passes
 	@property
 	def silent(self) ->bool:
 		return self.errors.silent
@@ -407,6 +445,10 @@ class Config:
 		interpret    : None|bool      = None,
 		optimization : None|str       = None,
 		argv         : None|list[str] = None,
+		cache        : None|bool      = None,
+		separate     : None|bool      = None,
+		jobs         : None|int       = None,
+		passes       : None|Passes    = None,
 	) -> 'Config':
 		if output_file  is None: output_file  = file[:file.rfind('.')]
 		if run_file     is None: run_file     = False
@@ -417,6 +459,10 @@ class Config:
 		if interpret    is None: interpret    = False
 		if optimization is None: optimization = '-O2'
 		if argv         is None: argv         = []
+		if cache        is None: cache        = True
+		if separate     is None: separate     = False
+		if jobs         is None: jobs         = 1
+		if passes       is None: passes       = Passes()
 		return cls(
 			file,
 			output_file,
@@ -427,7 +473,11 @@ class Config:
 			interpret,
 			optimization,
 			argv,
-			errors
+			errors,
+			cache,
+			separate,
+			jobs,
+			passes,
 		)
 
 def process_cmd_args(eb:ErrorBin,args:list[str]) -> Config:
@@ -442,6 +492,11 @@ def process_cmd_args(eb:ErrorBin,args:list[str]) -> Config:
 	interpret     = None
 	optimization  = None
 	argv          = None
+	cache         = None
+	separate      = None
+	jobs          = None
+	time_passes   = False
+	time_passes_json = None
 	args = args[1:]
 	idx = 0
 	while idx<len(args):
@@ -467,6 +522,17 @@ def process_cmd_args(eb:ErrorBin,args:list[str]) -> Config:
 				emit_llvm = True
 			elif flag == 'dump':
 				dump = True
+			elif flag == 'no-cache':
+				cache = False
+			elif flag == 'separate':
+				separate = True
+			elif flag == 'time-passes':
+				time_passes = True
+			elif flag == 'time-passes-json':
+				idx+=1
+				if idx>=len(args):
+					eb.critical_error(ET.CMD_PASSES_NAME,None,'expected file name after --time-passes-json option (-h for help)')
+				time_passes_json = args[idx]
 			else:
 				eb.add_error(ET.CMD_FLAG,None,f"flag '--{flag}' is not supported yet")
 		elif arg[:2] =='-o':
@@ -474,6 +540,14 @@ def process_cmd_args(eb:ErrorBin,args:list[str]) -> Config:
 			if idx>=len(args):
 				eb.critical_error(ET.CMD_O_NAME,None,'expected file name after -o option (-h for help)')
 			output_file = args[idx]
+		elif arg[:2] =='-j':
+			idx+=1
+			if idx>=len(args):
+				eb.critical_error(ET.CMD_JOBS,None,'expected number of jobs after -j option (-h for help)')
+			if not args[idx].isdecimal() or int(args[idx]) == 0:
+				eb.add_error(ET.CMD_JOBS,None,f"number of jobs should be a positive integer, not '{args[idx]}'")
+			else:
+				jobs = int(args[idx])
 		elif arg in ('-O0','-O1','-O2','-O3'):
 			optimization = arg
 		elif arg[0] == '-':
@@ -509,6 +583,10 @@ def process_cmd_args(eb:ErrorBin,args:list[str]) -> Config:
 		interpret     = interpret,
 		optimization  = optimization,
 		argv          = argv,
+		cache         = cache,
+		separate      = separate,
+		jobs          = jobs,
+		passes        = Passes(time_passes, time_passes_json),
 	)
 def usage(eb:ErrorBin,self_name:str|None) -> NoReturn:
 	eb.show_errors()
@@ -524,6 +602,11 @@ Flags:
 	-o --output    : specify output file `-o name` (do not combine short version)
 	-v --verbose   : generate debug output
 	   --dump      : dump ast of the program
+	   --no-cache  : do not use or update the cache of parsed modules and builds
+	   --separate  : compile every module to its own object, unchanged modules are not recompiled
+	-j             : with --separate, compile up to N modules at once `-j N` (do not combine short version)
+	   --time-passes      : print time and peak memory of every compilation phase (memory tracing slows compilation down)
+	   --time-passes-json : same as --time-passes, but write the report to a file `--time-passes-json name`
 	-l --emit-llvm : emit llvm ir
 	-O0 -O1        : optimization levels (last overrides)
 	-O2 -O3        : default is -O2
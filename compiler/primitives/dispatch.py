@@ -0,0 +1,25 @@
+from typing import Any, Callable, Concatenate, Generic, ParamSpec, TypeVar
+from .nodes import Node
+__all__ = [
+	'Dispatch',
+]
+P = TypeVar('P')#the pass, handlers are its methods
+R = TypeVar('R')#what handlers of the pass return
+N = TypeVar('N', bound=Node)
+A = ParamSpec('A')#handlers can take more arguments, when they are called directly, they must have defaults
+class Dispatch(Generic[P, R]):
+	"""node type -> handler of a pass, for every pass over nodes.
+	handlers are registered with `@dispatch.handles(nodes.X)` in the class body, so the table is built once, when the class is defined"""
+	__slots__ = ('handlers',)
+	def __init__(self) -> None:
+		self.handlers:dict[type[Node], Callable[[P, Any], R]] = {}
+	def handles(self, node_type:type[N]) -> Callable[[Callable[Concatenate[P, N, A], R]], Callable[Concatenate[P, N, A], R]]:
+		def register(handler:Callable[Concatenate[P, N, A], R]) -> Callable[Concatenate[P, N, A], R]:
+			assert node_type not in self.handlers, f"{node_type} is handled twice"
+			self.handlers[node_type] = handler
+			return handler
+		return register
+	def handler(self, node:Node) -> Callable[[P, Any], R]:
+		handler = self.handlers.get(type(node))
+		assert handler is not None, f"Unreachable, unknown {type(node)=}"
+		return handler
@@ -360,8 +360,9 @@ class Struct(Node):
 		return f"struct {self.name} {block([str(i) for i in self.variables]+[str(i) for i in self.static_variables]+[str(i) for i in self.funs])}"
 	def to_struct(self,unwrapper:Callable[[Node], Type]) -> types.Struct:
 		return types.Struct(self.name.operand,tuple((arg.name.operand,unwrapper(arg.typ)) for arg in self.variables),self.uid, tuple((fun.name.operand,fun.typ(unwrapper),fun.llvmid) for fun in self.funs))
-	def to_struct_kind(self,unwrapper:Callable[[Node], Type]) -> types.StructKind:
-		return types.StructKind(tuple((static.var.name.operand, unwrapper(static.var.typ)) for static in self.static_variables), self.to_struct(unwrapper))
+	def to_struct_kind(self,unwrapper:Callable[[Node], Type], struct:types.Struct) -> types.StructKind:
+		"""`struct` is the type, that was made by `to_struct`, types are compared by identity"""
+		return types.StructKind(tuple((static.var.name.operand, unwrapper(static.var.typ)) for static in self.static_variables), struct)
 @dataclass(slots=True, frozen=True)
 class Cast(Node):
 	typ:'Node'
@@ -488,8 +489,9 @@ class Enum(Node):
 		return f"enum {self.name} {block(f'{item}' for item in self.typed_items+self.items+self.funs)}"
 	def to_enum(self, unwrapper:Callable[[Node], Type]) -> types.Enum:
 		return types.Enum(self.name.operand, tuple(item.operand for item in self.items), tuple((item.name.operand,unwrapper(item.typ)) for item in self.typed_items), tuple((fun.name.operand,fun.typ(unwrapper),fun.llvmid) for fun in self.funs), self.uid)
-	def to_enum_kind(self, unwrapper:Callable[[Node], Type]) -> types.EnumKind:
-		return types.EnumKind(self.to_enum(unwrapper))
+	def to_enum_kind(self, enum:types.Enum) -> types.EnumKind:
+		"""`enum` is the type, that was made by `to_enum`, types are compared by identity"""
+		return types.EnumKind(enum)
 
 
 @dataclass(slots=True, frozen=True)
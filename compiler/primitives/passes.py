@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Iterator
+__all__ = [
+	'Passes',
+]
+@dataclass(slots=True)
+class Record:
+	phase  :str
+	module :str|None#None for phases of the whole program
+	seconds:float = 0.
+	peak   :int|None = None#bytes traced by tracemalloc, None for external tools
+	runs   :int = 0
+class Passes:
+	"""wall time and peak memory of compilation phases (`--time-passes`).
+	phases can be nested (parsing a module parses its imports), time of a phase does not include time of phases inside it,
+	peak memory does. when disabled, measuring does nothing, without `memory` only time is measured.
+	modules loaded from the AST cache are not lexed, so they have no `tokens` count"""
+	__slots__ = ('enabled', 'memory', 'json_file', 'records', 'counts', 'stack', 'started', 'lock')
+	def __init__(self, enabled:bool = False, json_file:str|None = None, memory:bool = True) -> None:
+		self.enabled  :bool                               = enabled or json_file is not None
+		self.memory   :bool                               = self.enabled and memory
+		self.json_file:str|None                           = json_file
+		self.records  :dict[tuple[str,str|None], Record]  = {}
+		self.counts   :dict[str, dict[str, int]]          = {}#module -> what was counted -> how many
+		self.stack    :list[tuple[Record, float]]         = []#phases, that are measured right now, and when they were (re)started
+		self.started  :float                              = time.perf_counter()
+		self.lock     :threading.Lock                     = threading.Lock()#tools are run from worker threads
+		if self.memory and not tracemalloc.is_tracing():
+			tracemalloc.start()
+	def record(self, phase:str, module:str|None) -> Record:
+		record = self.records.get((phase, module))
+		if record is None:
+			record = self.records[phase, module] = Record(phase, module)
+		return record
+	@contextmanager
+	def measure(self, phase:str, module:str|None = None) -> Iterator[None]:
+		"""phase of the compiler itself"""
+		if not self.enabled:
+			yield
+			return
+		record = self.record(phase, module)
+		record.runs += 1
+		now = time.perf_counter()
+		if self.stack:#pause outer phase
+			outer, started = self.stack[-1]
+			outer.seconds += now - started
+			if self.memory:
+				outer.peak = max(outer.peak or 0, tracemalloc.get_traced_memory()[1])
+		if self.memory:
+			tracemalloc.reset_peak()
+		self.stack.append((record, now))
+		try:
+			yield
+		finally:
+			_, started = self.stack.pop()
+			now = time.perf_counter()
+			record.seconds += now - started
+			if self.memory:
+				record.peak = max(record.peak or 0, tracemalloc.get_traced_memory()[1])
+			if self.stack:#resume outer phase, memory peak of inner phase is its peak too
+				outer, _ = self.stack[-1]
+				self.stack[-1] = outer, now
+				if self.memory:
+					outer.peak = max(outer.peak or 0, record.peak or 0)
+					tracemalloc.reset_peak()
+	def add_tool(self, tool:str, module:str|None, seconds:float) -> None:
+		"""run of an external tool, it does not use memory of this process"""
+		if not self.enabled:
+			return
+		with self.lock:
+			record = self.record(tool, module)
+			record.seconds += seconds
+			record.runs += 1
+	def count(self, module:str, what:str, amount:int) -> None:
+		if self.enabled:
+			self.counts.setdefault(module, {})[what] = amount
+	def report(self) -> None:
+		if not self.enabled:
+			return
+		total = time.perf_counter() - self.started
+		if self.json_file is not None:
+			with open(self.json_file, 'w', encoding='utf-8') as file:
+				json.dump({
+					'total_seconds':total,
+					'phases':[{'phase':r.phase, 'module':r.module, 'seconds':r.seconds, 'peak_bytes':r.peak, 'runs':r.runs} for r in self.records.values()],
+					'modules':self.counts,
+				}, file, indent='\t')
+			return
+		width = max([len(r.module or '') for r in self.records.values()] + [len(module) for module in self.counts] + [6])
+		print(f"{'phase':<12} {'module':<{width}} {'time(ms)':>10} {'peak(KiB)':>10}", file=sys.stderr)
+		for r in self.records.values():
+			peak = '-' if r.peak is None else f"{r.peak/1024:.0f}"
+			print(f"{r.phase:<12} {r.module or '-':<{width}} {r.seconds*1e3:>10.2f} {peak:>10}", file=sys.stderr)
+		print(f"{'total':<12} {'':<{width}} {total*1e3:>10.2f}", file=sys.stderr)
+		if self.counts:
+			names = sorted({what for counts in self.counts.values() for what in counts})
+			print(f"\n{'module':<{width}} {' '.join(f'{name:>10}' for name in names)}", file=sys.stderr)
+			for module, counts in self.counts.items():
+				cells = (str(counts.get(name, '-')) for name in names)
+				print(f"{module:<{width}} {' '.join(f'{cell:>10}' for cell in cells)}", file=sys.stderr)
+			if any('tokens' not in counts for counts in self.counts.values()):
+				print("(modules loaded from the AST cache are not lexed, they have no tokens)", file=sys.stderr)
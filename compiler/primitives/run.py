@@ -1,36 +1,222 @@
+import re
 import subprocess
+import hashlib
+import shutil
+import tempfile
 import os
-from typing import NoReturn
-from .core import Config, ET
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, NoReturn
+from .core import Config, ET, Error, CACHE_PATH
 __all__ = [
 	"run_command",
 	"replace_self",
-	"run_assembler"
+	"run_assembler",
+	"run_separate_assembler",
 ]
 
-def run_command(command:list[str], config:Config, put:None|str=None) -> int:
+def run_command(command:list[str], config:Config, put:None|str|Iterable[str]=None, module:str|None=None) -> int:
+	"""`put` is given to stdin, if it is not a string, it is written chunk by chunk without joining.
+	`module` is what the command works on, for `--time-passes`"""
 	config.errors.show_errors()
 	if config.verbose:
 		print(f"CMD: {' '.join(command)}" )
-	return subprocess.run(command, input=put, text=True, check=False).returncode
+	started = time.perf_counter()
+	if put is None or isinstance(put, str):
+		ret_code = subprocess.run(command, input=put, text=True, check=False).returncode
+	else:
+		with subprocess.Popen(command, stdin=subprocess.PIPE, text=True) as process:
+			assert process.stdin is not None
+			try:
+				for chunk in put:
+					process.stdin.write(chunk)
+				process.stdin.close()
+			except BrokenPipeError:#command exited early, exit code will tell why
+				pass
+		ret_code = process.returncode
+	config.passes.add_tool(command[0], module, time.perf_counter() - started)
+	return ret_code
 def replace_self(args:'list[str]',config:Config) -> NoReturn:
 	config.errors.show_errors()
 	if config.verbose:
 		print(f"INFO: handing execution to '{' '.join(args)}' (execvp)" )
 	os.execvp(args[0], args)
-def run_assembler(config:Config, text:str) -> None:
-	args = ['opt',  config.optimization, '-o', f'{config.output_file}.bc', '-']
+TOOLCHAIN = ('opt', 'clang')
+def toolchain_identity() -> str:
+	"""where tools are and when they were installed, changes with every upgrade and is cheaper than running `--version`"""
+	identity = []
+	for tool in TOOLCHAIN:
+		location = shutil.which(tool)
+		if location is None:
+			identity.append(f"{tool}:missing")
+			continue
+		stat = os.stat(location)
+		identity.append(f"{tool}:{os.path.realpath(location)}:{stat.st_size}:{stat.st_mtime_ns}")
+	return '\0'.join(identity)
+DATA_LAYOUT = re.compile(r'^target datalayout = "(.*)"$', re.MULTILINE)
+LAYOUTS:dict[str, str] = {}#toolchain identity -> data layout, for the whole run
+LAYOUTS_LOCK = threading.Lock()#modules are built from worker threads
+def target_data_layout(config:Config) -> str:
+	"""sizes and alignments of types on the machine clang compiles for.
+	IR does not say it, without it opt folds sizes of types with llvm defaults, where `{i1, i64}` is 12 bytes and not 16.
+	asked from clang once for every toolchain, kept on disk and in memory for the run.
+	it is a fact about the toolchain, not a build, so `--no-cache` does not make every build ask clang again"""
+	identity = toolchain_identity()
+	with LAYOUTS_LOCK:
+		layout = LAYOUTS.get(identity)
+		if layout is None:
+			layout = LAYOUTS[identity] = ask_data_layout(config, identity)
+	return layout
+def ask_data_layout(config:Config, identity:str) -> str:
+	path = os.path.join(CACHE_PATH, 'layout', hashlib.sha256(identity.encode()).hexdigest())
+	try:
+		with open(path, encoding='utf-8') as file:
+			return file.read()
+	except OSError:
+		pass
+	directory = tempfile.mkdtemp(prefix='jararaca-')
+	try:
+		ret_code = run_command(['clang', '-S', '-emit-llvm', '-x', 'c', os.devnull, '-o', os.path.join(directory, 'layout.ll')], config=config)
+		if ret_code != 0:
+			config.errors.critical_error(ET.CLANG,None,f"clang exited abnormally with exit code {ret_code} (use -v to see invocation)")
+		with open(os.path.join(directory, 'layout.ll'), encoding='utf-8') as file:
+			match = DATA_LAYOUT.search(file.read())
+	finally:
+		shutil.rmtree(directory, ignore_errors=True)
+	if match is None:
+		config.errors.critical_error(ET.CLANG, None, "clang did not tell data layout of the target")
+	try:
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		with open(f"{path}.{os.getpid()}.tmp", 'w', encoding='utf-8') as file:
+			file.write(match[1])
+		os.replace(f"{path}.{os.getpid()}.tmp", path)
+	except OSError:#without a cache it is asked on every run
+		pass
+	return match[1]
+def build_cache_path(config:Config, chunks:list[str]) -> str:
+	"""directory for `.bc` and executable, that were built from exactly this IR by the same toolchain"""
+	hash = hashlib.sha256(f"{config.optimization}\0{toolchain_identity()}\0{target_data_layout(config)}\0".encode())
+	for chunk in chunks:
+		hash.update(chunk.encode())
+	return os.path.join(CACHE_PATH, 'build', hash.hexdigest())
+def load_build(config:Config, path:str) -> bool:
+	try:
+		shutil.copy(os.path.join(path, 'out.bc'), f'{config.output_file}.bc')
+		shutil.copy(os.path.join(path, 'out'), f'{config.output_file}.out')#permission bits are copied too
+	except OSError:
+		return False
+	if config.verbose:
+		print(f"INFO: IR did not change, using build from '{path}'")
+	return True
+def save_build(config:Config, path:str) -> None:
+	temporary = f"{path}.{os.getpid()}.tmp"
+	try:
+		os.makedirs(temporary, exist_ok=True)
+		shutil.copy(f'{config.output_file}.bc', os.path.join(temporary, 'out.bc'))
+		shutil.copy(f'{config.output_file}.out', os.path.join(temporary, 'out'))
+		os.rename(temporary, path)#readers never see a half written entry
+	except OSError:
+		shutil.rmtree(temporary, ignore_errors=True)
+def run_assembler(config:Config, text:Iterable[str]) -> None:
+	cache_path = None
+	if config.cache:
+		chunks = list(text)#IR is hashed and then streamed from the same chunks
+		cache_path = build_cache_path(config, chunks)
+		text = chunks
+		if load_build(config, cache_path):
+			if config.emit_llvm:
+				disassemble(config)
+			return
+	build(config, text)
+	if cache_path is not None:
+		save_build(config, cache_path)
+def disassemble(config:Config) -> None:
+	args = ['llvm-dis', f'{config.output_file}.bc',  '-o', f'{config.output_file}.ll']
+	ret_code = run_command(args,config=config)
+	if ret_code != 0:
+		config.errors.add_error(ET.LLVM_DIS, None, f"llvm disassembler 'llvm-dis' exited abnormally with exit code {ret_code} (use -v to see invocation)")
+def build(config:Config, text:Iterable[str]) -> None:
+	args = ['opt',  config.optimization, f'--data-layout={target_data_layout(config)}', '-o', f'{config.output_file}.bc', '-']
 	ret_code = run_command(args,config=config,put=text)
 	if ret_code != 0:
 		config.errors.critical_error(ET.OPT, None, f"llvm optimizer 'opt' exited abnormally with exit code {ret_code} (use -v to see invocation)")
 	if config.emit_llvm:
-		args = ['llvm-dis', f'{config.output_file}.bc',  '-o', f'{config.output_file}.ll']
-		ret_code = run_command(args,config=config)
-		if ret_code != 0:
-			config.errors.add_error(ET.LLVM_DIS, None, f"llvm disassembler 'llvm-dis' exited abnormally with exit code {ret_code} (use -v to see invocation)")
+		disassemble(config)
 	ret_code = run_command(['clang',config.output_file+'.bc', config.optimization, '-Wno-override-module', '-lgc', '-o', config.output_file+'.out'],config=config)
 	if ret_code != 0:
 		config.errors.critical_error(ET.CLANG,None,f"clang exited abnormally with exit code {ret_code} (use -v to see invocation)")
 	ret_code = run_command(['chmod', '+x', config.output_file+'.out'],config=config)
 	if ret_code != 0:
 		config.errors.critical_error(ET.CHMOD, None, f"chmod exited abnormally with exit code {ret_code} (use -v to see invocation)")
+def object_directory(config:Config, key:str) -> str:
+	hash = hashlib.sha256(f"{key}\0{config.optimization}\0{toolchain_identity()}\0{target_data_layout(config)}".encode())
+	return os.path.join(CACHE_PATH, 'objects', hash.hexdigest())
+def compile_object(config:Config, module_path:str, text:Iterable[str], directory:str) -> Error|None:
+	"""`out.bc` and `out.o` of one module in `directory`.
+	runs in worker threads, so failure is returned instead of being added to `config.errors`"""
+	ret_code = run_command(['opt', config.optimization, f'--data-layout={target_data_layout(config)}', '-o', os.path.join(directory, 'out.bc'), '-'], config=config, put=text, module=module_path)
+	if ret_code != 0:
+		return Error(None, ET.OPT, f"llvm optimizer 'opt' exited abnormally with exit code {ret_code} (use -v to see invocation)")
+	ret_code = run_command(['clang', '-c', os.path.join(directory, 'out.bc'), config.optimization, '-Wno-override-module', '-o', os.path.join(directory, 'out.o')], config=config, module=module_path)
+	if ret_code != 0:
+		return Error(None, ET.CLANG, f"clang exited abnormally with exit code {ret_code} (use -v to see invocation)")
+	return None
+def build_object(config:Config, module_path:str, text:Iterable[str], temporary:str, directory:str) -> Error|None:
+	"""builds object in `temporary` and moves it to `directory`, when `directory` is in the cache"""
+	os.makedirs(temporary, exist_ok=True)
+	error = compile_object(config, module_path, text, temporary)
+	if temporary == directory:
+		return error
+	if error is not None:
+		shutil.rmtree(temporary, ignore_errors=True)
+		return error
+	try:
+		os.rename(temporary, directory)#readers never see a half written entry
+	except OSError:#same object was built by someone else
+		shutil.rmtree(temporary, ignore_errors=True)
+	return None
+def run_separate_assembler(config:Config, units:'list[tuple[str, str, Iterable[str]]]') -> None:
+	"""every unit is a module path, key of its object and its IR.
+	objects are built only for keys, that were not built before, up to `config.jobs` at once, and then linked together"""
+	temporary_root = tempfile.mkdtemp(prefix='jararaca-') if not config.cache else None
+	target_data_layout(config)#asked here, failure is reported from the main thread and workers find it in memory
+	directories = []
+	failed = False
+	with ThreadPoolExecutor(max_workers=config.jobs) as pool:#tools run in their own processes, threads only wait for them
+		builds = []
+		for module_path, key, text in units:
+			if temporary_root is not None:
+				directory = os.path.join(temporary_root, module_path)
+				builds.append(pool.submit(build_object, config, module_path, text, directory, directory))
+				directories.append(directory)
+				continue
+			directory = object_directory(config, key)
+			if os.path.isdir(directory):
+				if config.verbose:
+					print(f"INFO: Module '{module_path}' did not change, using object from '{directory}'")
+			else:
+				builds.append(pool.submit(build_object, config, module_path, text, f"{directory}.{os.getpid()}.tmp", directory))
+			directories.append(directory)
+		for build in builds:
+			error = build.result()
+			if error is not None:
+				config.errors.add_error(error.typ, error.place, error.msg)
+				failed = True
+	if failed and temporary_root is not None:
+		shutil.rmtree(temporary_root, ignore_errors=True)
+	config.errors.show_errors()
+	if config.emit_llvm or config.interpret:#both need the whole program as one bitcode file
+		ret_code = run_command(['llvm-link', *(os.path.join(directory, 'out.bc') for directory in directories), '-o', f'{config.output_file}.bc'], config=config)
+		if ret_code != 0:
+			config.errors.critical_error(ET.LLVM_LINK, None, f"llvm linker 'llvm-link' exited abnormally with exit code {ret_code} (use -v to see invocation)")
+		if config.emit_llvm:
+			disassemble(config)
+	ret_code = run_command(['clang', *(os.path.join(directory, 'out.o') for directory in directories), config.optimization, '-lgc', '-o', config.output_file+'.out'],config=config)
+	if ret_code != 0:
+		config.errors.critical_error(ET.CLANG,None,f"clang exited abnormally with exit code {ret_code} (use -v to see invocation)")
+	if temporary_root is not None:
+		shutil.rmtree(temporary_root, ignore_errors=True)
+	ret_code = run_command(['chmod', '+x', config.output_file+'.out'],config=config)
+	if ret_code != 0:
+		config.errors.critical_error(ET.CHMOD, None, f"chmod exited abnormally with exit code {ret_code} (use -v to see invocation)")
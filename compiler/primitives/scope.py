@@ -0,0 +1,34 @@
+from typing import Generic, TypeVar
+__all__ = [
+	'Scope',
+]
+T = TypeVar('T')
+class Scope(Generic[T]):
+	"""names, that are visible right now.
+	`enter` marks start of a block, `leave` undoes every definition made since the matching `enter`,
+	so shadowed names come back without copying all visible names on every block"""
+	__slots__ = ('names', 'undo', 'marks')
+	def __init__(self) -> None:
+		self.names:dict[str, T]             = {}
+		self.undo :list[tuple[str, T|None]] = []#name and what it was before, None if it was not defined
+		self.marks:list[int]                = []#length of undo log at the start of every block
+	def __getitem__(self, name:str) -> T:
+		return self.names[name]
+	def __setitem__(self, name:str, value:T) -> None:
+		if self.marks:#nothing to undo at top level
+			self.undo.append((name, self.names.get(name)))
+		self.names[name] = value
+	def __contains__(self, name:str) -> bool:
+		return name in self.names
+	def get(self, name:str) -> T|None:
+		return self.names.get(name)
+	def enter(self) -> None:
+		self.marks.append(len(self.undo))
+	def leave(self) -> None:
+		mark = self.marks.pop()
+		while len(self.undo) > mark:
+			name, value = self.undo.pop()
+			if value is None:
+				del self.names[name]
+			else:
+				self.names[name] = value
@@ -1,46 +1,28 @@
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from .core import Config, Place, escape, Loc, ET
+from typing import Iterator
+from .core import Place, escape, Loc, new_object, make_loc, make_place
 __all__ = [
 	'Token',
 	'TT',
+	'LineTable',
+	'TokenBuffer',
 ]
-@dataclass(slots=True, frozen=True, order=True)
-class draft_loc:
-	file_path:str
-	file_text:str = field(compare=False, repr=False)
-	config:Config
-	idx:int       = 0
-	rows:int      = field(default=1, compare=False, repr=False)
-	cols:int      = field(default=1, compare=False, repr=False)
-	def __add__(self, number:int) -> 'draft_loc':
-		idx, cols, rows = self.idx, self.cols, self.rows
-		if idx+number>=len(self.file_text):
-			self.config.errors.add_error(ET.EOF, Place(self.to_loc(),self.to_loc()), "unexpected end of file while lexing")
-			number = len(self.file_text)-idx-1
-		for _ in range(number):
-			idx+=1
-			cols+=1
-			if self.file_text[idx-1] =='\n':
-				cols = 1
-				rows+= 1
-		return self.__class__(self.file_path, self.file_text, self.config, idx, rows, cols)
-	def __str__(self) -> str:
-		return f"{self.file_path}:{self.rows}:{self.cols}"
-
-	@property
-	def char(self) -> str:
-		return self.file_text[self.idx]
-	def __bool__(self) -> bool:
-		return self.idx < len(self.file_text)-1
-
-	def to_loc(self) -> Loc:
-		return Loc(
-			file_path= self.file_path,
-			idx      = self.idx,
-			line     = self.rows,
-			cols     = self.cols,
-		)
+class LineTable:
+	"""maps offsets in a file to `Loc`s, lines and cols are computed only when a `Loc` is needed"""
+	__slots__ = ('file_path', 'line_starts')
+	def __init__(self, file_path:str, file_text:str) -> None:
+		self.file_path  :str       = file_path
+		self.line_starts:list[int] = [0]
+		start = file_text.find('\n')
+		while start != -1:
+			self.line_starts.append(start+1)
+			start = file_text.find('\n', start+1)
+	def to_loc(self, idx:int) -> Loc:
+		line = bisect_right(self.line_starts, idx)
+		return make_loc(self.file_path, idx, line, idx - self.line_starts[line-1] + 1)
 class TT(Enum):
 	ARROW                 = auto()
 	ASTERISK              = auto()
@@ -134,3 +116,58 @@ class Token:
 
 	def __hash__(self) -> int:
 		return hash((self.typ, self.operand))
+set_place, set_typ, set_operand = (Token.__dict__[name].__set__ for name in ('place', 'typ', 'operand'))
+def make_token(place:Place, typ:TT, operand:str = '') -> Token:
+	"""same as `Token(...)`, see `make_loc`"""
+	token = new_object(Token)
+	set_place(token, place)
+	set_typ(token, typ)
+	set_operand(token, operand)
+	return token
+
+TT_BY_VALUE:dict[int,TT] = {typ.value:typ for typ in TT}
+class TokenBuffer:
+	"""tokens of one file stored column-wise, 16 bytes per token instead of a Token, a Place and 2 Locs.
+	`Token`s and `Place`s are materialized only when asked for"""
+	__slots__ = ('lines', 'typs', 'starts', 'ends', 'operand_ids', 'operands', 'operand_table')
+	def __init__(self, lines:LineTable) -> None:
+		self.lines        :LineTable     = lines
+		self.typs         :array[int]    = array('i')
+		self.starts       :array[int]    = array('i')
+		self.ends         :array[int]    = array('i')
+		self.operand_ids  :array[int]    = array('i')
+		self.operands     :list[str]     = ['']#interned, index 0 is no operand
+		self.operand_table:dict[str,int] = {'':0}
+	def append(self, typ:TT, start:int, end:int, operand:str = '') -> None:
+		operand_id = self.operand_table.get(operand)
+		if operand_id is None:
+			operand_id = self.operand_table[operand] = len(self.operands)
+			self.operands.append(operand)
+		self.typs.append(typ.value)
+		self.starts.append(start)
+		self.ends.append(end)
+		self.operand_ids.append(operand_id)
+	def add(self, token:Token) -> None:
+		self.append(token.typ, token.place.start.idx, token.place.end.idx, token.operand)
+	def __len__(self) -> int:
+		return len(self.typs)
+	def typ(self, idx:int) -> TT:
+		return TT_BY_VALUE[self.typs[idx]]
+	def operand(self, idx:int) -> str:
+		return self.operands[self.operand_ids[idx]]
+	def place(self, idx:int) -> Place:
+		start = self.lines.to_loc(self.starts[idx])
+		if self.ends[idx] == self.starts[idx]:
+			return make_place(start, start)
+		return make_place(start, self.lines.to_loc(self.ends[idx]))
+	def __getitem__(self, idx:int) -> Token:
+		return make_token(self.place(idx), self.typ(idx), self.operand(idx))
+	def __iter__(self) -> Iterator[Token]:
+		for idx in range(len(self.typs)):
+			yield self[idx]
+	def index_at(self, offset:int) -> int|None:
+		"""index of the token, that covers `offset`, None if it is between tokens"""
+		idx = bisect_right(self.starts, offset)-1
+		if idx < 0 or offset > self.ends[idx]:
+			return None
+		return idx
@@ -1,5 +1,7 @@
 from enum import Enum as pythons_enum, auto
 from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, ClassVar, TypeVar, cast
 import math
 __all__ = [
 	'Type',
@@ -22,9 +24,10 @@ class Primitive(Type, pythons_enum):
 	VOID  = auto()
 	CHAR  = auto()
 	SHORT = auto()
+	__hash__ = object.__hash__#members are compared by identity, hash of Enum hashes the name in python
 	def __str__(self) -> str:
 		return self.name.lower()
-	@property
+	@cached_property
 	def llvm(self) -> str:
 		table:dict[Type, str] = {
 			Primitive.VOID : 'void',
@@ -45,23 +48,67 @@ STR   = Primitive.STR
 VOID  = Primitive.VOID
 CHAR  = Primitive.CHAR
 SHORT = Primitive.SHORT
-@dataclass(slots=True, frozen=True)
-class Ptr(Type):
+INTERNED:'dict[tuple[object, ...], Interned]' = {}#kind and fields -> the type, for one compilation
+I = TypeVar('I', bound='Interned')
+def reset_interned() -> None:
+	"""forgets types of the previous compilation, processes, that compile many programs, would keep all of them otherwise.
+	called by entry points before a compilation starts, types made before it must not be used after it"""
+	INTERNED.clear()
+class Interned(Type):
+	"""type, that is nothing more than its fields: equal types are one object, so they are compared by identity.
+	`llvm` and `sized` are computed once, by `make_llvm` and `is_sized`"""
+	__slots__ = ('memo_llvm', 'memo_sized')
+	__dataclass_fields__:ClassVar[dict[str, Any]]#set by @dataclass of every kind
+	def __new__(cls:type[I], *args:object) -> I:
+		key = (cls, *args)
+		typ = INTERNED.get(key)
+		if typ is not None:
+			return cast(I, typ)#key starts with the class
+		new = object.__new__(cls)
+		for name, value in zip(cls.__dataclass_fields__, args, strict=True):
+			object.__setattr__(new, name, value)
+		object.__setattr__(new, 'memo_llvm', None)
+		object.__setattr__(new, 'memo_sized', None)
+		INTERNED[key] = new
+		return new
+	def __init__(self, *args:object) -> None:
+		pass#fields are set by __new__, only for new types
+	def __reduce__(self) -> 'tuple[type, tuple[object, ...]]':
+		return type(self), tuple(getattr(self, name) for name in self.__dataclass_fields__)
+	memo_llvm:'str|None'
+	memo_sized:'bool|None'
+	@property
+	def llvm(self) -> str:
+		if self.memo_llvm is None:
+			object.__setattr__(self, 'memo_llvm', self.make_llvm())
+			assert self.memo_llvm is not None
+		return self.memo_llvm
+	def make_llvm(self) -> str:
+		raise NotImplementedError
+	@property
+	def sized(self) -> bool:
+		if self.memo_sized is None:
+			object.__setattr__(self, 'memo_sized', False)#type, that contains itself, is not sized
+			object.__setattr__(self, 'memo_sized', self.is_sized())
+			assert self.memo_sized is not None
+		return self.memo_sized
+	def is_sized(self) -> bool:
+		raise NotImplementedError
+@dataclass(slots=True, frozen=True, eq=False, init=False)
+class Ptr(Interned):
 	pointed:Type
 	def __str__(self) -> str:
 		return f"*{self.pointed}"
-	@property
-	def llvm(self) -> str:
+	def make_llvm(self) -> str:
 		p = self.pointed.llvm
 		if p == 'ptr':
 			return "ptr"
 		if p == 'void':
 			return 'i8*'
 		return f"{p}*"
-	@property
-	def sized(self) -> bool:
+	def is_sized(self) -> bool:
 		return True
-@dataclass()#no slots or frozen to simulate a pointer
+@dataclass(eq=False)#no slots or frozen to simulate a pointer, so it is compared by identity too
 class Struct(Type):#modifying is allowed only to create recursive data
 	name:str
 	variables:tuple[tuple[str,Type],...]
@@ -88,69 +135,55 @@ class Struct(Type):#modifying is allowed only to create recursive data
 		ret = self.is_sized()
 		self.__is_sizing = False
 		return ret
-@dataclass(slots=True, frozen=True)
-class Fun(Type):
+@dataclass(slots=True, frozen=True, eq=False, init=False)
+class Fun(Interned):
 	arg_types:tuple[Type, ...]
 	return_type:Type
 	def __str__(self) -> str:
 		return f"({', '.join(f'{arg}' for arg in self.arg_types)}) -> {self.return_type}"
-	@property
-	def llvm(self) -> str:
+	def make_llvm(self) -> str:
 		return f"{self.return_type.llvm} ({', '.join(arg.llvm for arg in self.arg_types)})*"
-	@property
-	def sized(self) -> bool:
+	def is_sized(self) -> bool:
 		return True
-@dataclass(slots=True, frozen=True)
-class Module(Type):
+@dataclass(slots=True, frozen=True, eq=False, init=False)
+class Module(Interned):
 	module_uid:'int'
 	path:'str'
 	def __str__(self) -> str:
 		return f"#module({self.path})"
-	@property
-	def llvm(self) -> str:
+	def make_llvm(self) -> str:
 		assert False, "Module type is not saveable"
-	@property
-	def sized(self) -> bool:
+	def is_sized(self) -> bool:
 		return False
-@dataclass(slots=True, frozen=True)
-class Mix(Type):
+@dataclass(slots=True, frozen=True, eq=False, init=False)
+class Mix(Interned):
 	funs:tuple[Type, ...]
 	name:str
 	def __str__(self) -> str:
 		return f"#mix({self.name})"
-	@property
-	def llvm(self) -> str:
+	def make_llvm(self) -> str:
 		assert False, "Mix type is not saveable"
-	@property
-	def sized(self) -> bool:
+	def is_sized(self) -> bool:
 		return False
 
-@dataclass(slots=True)
-class Array(Type):
+@dataclass(slots=True, frozen=True, eq=False, init=False)
+class Array(Interned):
 	typ:Type
 	size:int = 0
+	def __new__(cls, typ:Type, size:int = 0) -> 'Array':#`Array(typ)` and `Array(typ, 0)` are one type
+		return Interned.__new__(cls, typ, size)
 	def __str__(self) -> str:
 		if self.size == 0:
 			return f"[]{self.typ}"
 		return f"[{self.size}]{self.typ}"
-	@property
-	def llvm(self) -> str:
+	def make_llvm(self) -> str:
 		return f"[{self.size} x {self.typ.llvm}]"
 	def is_sized(self) -> bool:
 		if self.size == 0:
 			return False
 		return self.typ.sized
-	__is_sizing:bool = False
-	@property
-	def sized(self) -> bool:
-		if self.__is_sizing:
-			return False
-		self.__is_sizing = True
-		ret = self.is_sized()
-		self.__is_sizing = False
-		return ret
-@dataclass(slots=True)
-class StructKind(Type):
+@dataclass(slots=True, frozen=True, eq=False, init=False)
+class StructKind(Interned):
 	statics:tuple[tuple[str,Type], ...]
 	struct:'Struct'
 	@property
@@ -161,25 +194,15 @@ class StructKind(Type):
 		return self.struct.struct_uid
 	def __str__(self) -> str:
 		return f"#structkind({self.name})"
-	@property
-	def llvm(self) -> str:
+	def make_llvm(self) -> str:
 		return f"%\"structkind.{self.struct_uid}.{self.name}\""
 	@property
 	def llvmid(self) -> str:
 		return f"@__structkind.{self.struct_uid}.{self.name}"
 	def is_sized(self) -> bool:
 		return all(var.sized for _,var in self.statics)
-	__is_sizing:bool = False
-	@property
-	def sized(self) -> bool:
-		if self.__is_sizing:
-			return False
-		self.__is_sizing = True
-		ret = self.is_sized()
-		self.__is_sizing = False
-		return ret
-@dataclass(slots=True, frozen=True)
-class BoundFun(Type):
+@dataclass(slots=True, frozen=True, eq=False, init=False)
+class BoundFun(Interned):
 	fun:'Fun'
 	typ:Type
 	val:'str'
@@ -188,15 +211,13 @@ class BoundFun(Type):
 		return Fun(tuple(i for i in self.fun.arg_types[1:]),self.fun.return_type)
 	def __str__(self) -> str:
 		return f"#bound_fun({self.typ}, {self.typ})"
-	@property
-	def llvm(self) -> str:
+	def make_llvm(self) -> str:
 		assert False, f"bound fun is not saveable"
-	@property
-	def sized(self) -> bool:
+	def is_sized(self) -> bool:
 		return False
 
 
-@dataclass()#no slots or frozen to simulate a pointer
+@dataclass(eq=False)#no slots or frozen to simulate a pointer, so it is compared by identity too
 class Enum(Type):#modifying is allowed only to create recursive data
 	name:str
 	items:tuple[str,...]
@@ -211,13 +232,27 @@ class Enum(Type):#modifying is allowed only to create recursive data
 			if name == f'__{magic}__':
 				return fun,llvmid
 		return None
-	@property
+	@cached_property
+	def max_item_layout(self) -> tuple[int, int]:
+		"""size and alignment of the payload: room for the biggest typed item, aligned for the most aligned one"""
+		layouts = [layout(typ) for _,typ in self.typed_items]
+		alignment = max((alignment for _,alignment in layouts), default=1)
+		size = max((size for size,_ in layouts), default=0)
+		return math.ceil(size/alignment)*alignment, alignment
+	@cached_property
 	def llvm_max_item(self) -> str:
-		return f"{{{', '.join(typ.llvm for name,typ in self.typed_items)}}}"#FIXME: find a typ that is maximum of the size and use him as 2nd typ (instead of struct of all types)
+		"""typed items are stored in it through a bitcast pointer"""
+		size, alignment = self.max_item_layout
+		return f"[{size//alignment} x {self.llvm_max_item_element}]"
+	@cached_property
+	def llvm_max_item_element(self) -> str:
+		"""items of this type are the first element of the payload, so they need no bitcast"""
+		_, alignment = self.max_item_layout
+		return f"i{alignment*8}"
 	@property
 	def llvm_item_id(self) -> str:
 		length = len(self.items)+len(self.typed_items)
-		bits = math.ceil(math.log2(length)) if length != 0 else 1
+		bits = max(math.ceil(math.log2(length)), 1) if length != 0 else 1
 		return f"i{bits}"
 	def __str__(self) -> str:
 		return self.name
@@ -233,8 +268,39 @@ class Enum(Type):#modifying is allowed only to create recursive data
 		self.__is_sizing = False
 		return ret
 
-@dataclass(slots=True, frozen=True)
-class EnumKind(Type):
+POINTER_SIZE = 8#sizes, lengths and pointers converted to ints are i64, so only 64 bit targets are supported
+def layout_of_integer(bits:int) -> tuple[int, int]:
+	size = 1
+	while size*8 < bits:
+		size *= 2
+	return size, min(size, 8)
+def layout_of_struct(members:'list[tuple[int, int]]') -> tuple[int, int]:
+	"""members are put at the next offset aligned for them, struct is padded to its biggest alignment"""
+	offset, alignment = 0, 1
+	for size, align in members:
+		offset = math.ceil(offset/align)*align + size
+		alignment = max(alignment, align)
+	return math.ceil(offset/alignment)*alignment, alignment
+def layout(typ:Type) -> tuple[int, int]:
+	"""size and alignment of sized `typ` in bytes, as data layouts of 64 bit targets put it in memory"""
+	if typ == STR:#packed <{ i64, [0 x i8]* }>
+		return 8+POINTER_SIZE, 1
+	if isinstance(typ, Primitive):
+		return layout_of_integer({INT:64, SHORT:32, CHAR:8, BOOL:1}[typ])
+	if isinstance(typ, (Ptr, Fun)):
+		return POINTER_SIZE, POINTER_SIZE
+	if isinstance(typ, Array):
+		size, alignment = layout(typ.typ)
+		return size*typ.size, alignment
+	if isinstance(typ, Enum):
+		return layout_of_struct([layout_of_integer(int(typ.llvm_item_id[1:])), typ.max_item_layout])
+	if isinstance(typ, Struct):
+		return layout_of_struct([layout(var) for _,var in typ.variables])
+	assert isinstance(typ, StructKind), f"{typ} is not sized"
+	return layout_of_struct([layout(var) for _,var in typ.statics])
+
+@dataclass(slots=True, frozen=True, eq=False, init=False)
+class EnumKind(Interned):
 	enum:'Enum'
 	@property
 	def name(self) -> str:
@@ -244,11 +310,9 @@ class EnumKind(Type):
 		return self.enum.enum_uid
 	def __str__(self) -> str:
 		return f"#enum_kind({self.name})"
-	@property
-	def llvm(self) -> str:
+	def make_llvm(self) -> str:
 		assert False, f"enum kind is not saveable"
 	def llvmid_of_type_function(self, idx:int) -> str:
 		return f"@\"__enum.{self.enum_uid}.{self.name}.fun_to_create_enum_no.{idx}.{self.enum.typed_items[idx][0]}\""
-	@property
-	def sized(self) -> bool:
+	def is_sized(self) -> bool:
 		return False
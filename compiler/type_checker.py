@@ -1,8 +1,8 @@
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Callable
+from typing import Callable, ClassVar
 
-from .primitives import nodes, Node, ET, Config, Type, types, DEFAULT_TEMPLATE_STRING_FORMATTER, BUILTIN_WORDS, Place
+from .primitives import nodes, Node, ET, Config, Type, types, DEFAULT_TEMPLATE_STRING_FORMATTER, BUILTIN_WORDS, Place, Scope, Dispatch
 __all__ = (
 	'SemanticTokenType',
 	'SemanticTokenModifier',
@@ -41,22 +41,33 @@ class SemanticToken:
 	typ:SemanticTokenType
 	modifiers:tuple[SemanticTokenModifier,...] = ()
 class TypeChecker:
-	__slots__ = ('config', 'module', 'modules', 'names', 'type_names', 'expected_return_type', 'semantic', 'semantic_tokens')
-	def __init__(self, module:nodes.Module, config:Config, semantic:bool = False) -> None:
+	__slots__ = ('config', 'module', 'modules', 'checked', 'names', 'type_names', 'expected_return_type', 'semantic', 'semantic_tokens')
+	dispatch:'ClassVar[Dispatch[TypeChecker, Type]]' = Dispatch()#node type -> its check_ method
+	checked_count:int = 0#number of modules checked by all TypeCheckers, each module should be checked once per compilation
+	def __init__(self, module:nodes.Module, config:Config, semantic:bool = False, checked:'dict[str, TypeChecker]|None' = None) -> None:
 		self.module = module
 		self.config = config
-		self.names:dict[str, Type] = {}#regular definitions like `var x int`
+		self.names:Scope[Type] = Scope()#regular definitions like `var x int`
 		self.type_names:dict[str, Type] = {}#type definitions like `struct X {}`
 		self.modules:dict[int, TypeChecker] = {}
+		self.checked:dict[str, TypeChecker] = {} if checked is None else checked#shared by the whole compilation, module path -> its checker
 		self.expected_return_type:Type = types.VOID
 		self.semantic:bool = semantic
 		if self.semantic:
 			self.semantic_tokens:set[SemanticToken] = set()
+	def check_module(self, module:nodes.Module) -> 'TypeChecker':
+		"""checker of an imported module, checking it if it was not checked yet"""
+		tc = self.checked.get(module.path)
+		if tc is None:
+			tc = TypeChecker(module, self.config, checked=self.checked)
+			self.checked[module.path] = tc
+			tc.go_check()
+		self.modules[module.uid] = tc
+		return tc
 	def go_check(self) -> None:
+		TypeChecker.checked_count += 1
 		if self.module.builtin_module is not None:
-			tc = TypeChecker(self.module.builtin_module, self.config)
-			tc.go_check()
-			self.modules[self.module.builtin_module.uid] = tc
+			tc = self.check_module(self.module.builtin_module)
 			for name in BUILTIN_WORDS:
 				type_definition = tc.type_names.get(name)
 				definition = tc.names.get(name)
@@ -68,13 +79,9 @@ class TypeChecker:
 		for top in self.module.tops:
 			if isinstance(top,nodes.Import):
 				self.names[top.name] = types.Module(top.module.uid,top.module.path)
-				tc = TypeChecker(top.module, self.config)
-				self.modules[top.module.uid] = tc
-				tc.go_check()
+				self.check_module(top.module)
 			elif isinstance(top,nodes.FromImport):
-				tc = TypeChecker(top.module, self.config)
-				tc.go_check()
-				self.modules[top.module.uid] = tc
+				tc = self.check_module(top.module)
 				for nam in top.imported_names:
 					name = nam.operand
 					type_definition = tc.type_names.get(name)
@@ -109,22 +116,25 @@ class TypeChecker:
 				actual_struct_type = top.to_struct(self.check)
 				struct_type.__dict__ = actual_struct_type.__dict__#FIXME
 				del actual_struct_type
-				self.names[top.name.operand] = top.to_struct_kind(self.check)
+				self.names[top.name.operand] = top.to_struct_kind(self.check, struct_type)
 			elif isinstance(top,nodes.Enum):
 				enum_type = types.Enum('',(),(),(),0)
 				self.type_names[top.name.operand] = enum_type
 				actual_enum_type = top.to_enum(self.check)
 				enum_type.__dict__ = actual_enum_type.__dict__#FIXME
 				del actual_enum_type
-				self.names[top.name.operand] = top.to_enum_kind(self.check)
+				self.names[top.name.operand] = top.to_enum_kind(enum_type)
 		for top in self.module.tops:
 			self.check(top)
+	@dispatch.handles(nodes.Import)
 	def check_import(self, node:nodes.Import) -> Type:
 		if self.semantic:self.semantic_tokens.add(SemanticToken(node.path_place, SemanticTokenType.MODULE, (SemanticTokenModifier.DECLARATION,)))
 		return types.VOID
+	@dispatch.handles(nodes.FromImport)
 	def check_from_import(self, node:nodes.FromImport) -> Type:
 		if self.semantic:self.semantic_tokens.add(SemanticToken(node.path_place, SemanticTokenType.MODULE, (SemanticTokenModifier.DECLARATION,)))
 		return types.VOID
+	@dispatch.handles(nodes.Enum)
 	def check_enum(self, node:nodes.Enum) -> Type:
 		if self.semantic:self.semantic_tokens.add(SemanticToken(node.name.place, SemanticTokenType.ENUM, (SemanticTokenModifier.DEFINITION,)))
 		if self.semantic:
@@ -132,8 +142,8 @@ class TypeChecker:
 				self.semantic_tokens.add(SemanticToken(item.place, SemanticTokenType.ENUM_ITEM, (SemanticTokenModifier.DEFINITION,)))
 			for typed_item in node.typed_items:
 				self.semantic_tokens.add(SemanticToken(typed_item.name.place, SemanticTokenType.ENUM_ITEM, (SemanticTokenModifier.DEFINITION,)))
+		self_should_be = types.Ptr(self.type_names[node.name.operand])
 		for fun in node.funs:
-			self_should_be = types.Ptr(node.to_enum(self.check))
 			if len(fun.arg_types)==0:
 				self.config.errors.critical_error(ET.ENUM_FUN_ARGS, fun.args_place, f"bound function's argument 0 should be '{self_should_be}' (self), found 0 arguments")
 			elif self.check(fun.arg_types[0].typ) != self_should_be:
@@ -146,23 +156,26 @@ class TypeChecker:
 					self.config.errors.critical_error(ET.ENUM_STR_MAGIC_RET, fun.return_type_place, f"magic function '__str__' should return {types.STR}, not {fun.return_type}")
 			self.check_fun(fun, semantic_type=SemanticTokenType.BOUND_FUNCTION)
 		return types.VOID
+	@dispatch.handles(nodes.Fun)
 	def check_fun(self, node:nodes.Fun, semantic_type:SemanticTokenType = SemanticTokenType.FUNCTION) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.name.place,semantic_type,(SemanticTokenModifier.DEFINITION,)))
 			for arg in node.arg_types:
 				self.semantic_tokens.add(SemanticToken(arg.name.place,SemanticTokenType.ARGUMENT,(SemanticTokenModifier.DECLARATION,)))
-		vars_before = self.names.copy()
-		self.names.update({arg.name.operand:self.check(arg.typ) for arg in node.arg_types})
+		self.names.enter()
+		for arg in node.arg_types:
+			self.names[arg.name.operand] = self.check(arg.typ)
 		self.expected_return_type = self.check(node.return_type) if node.return_type is not None else types.VOID
 		actual_ret_typ = self.check(node.code)
 		specified_ret_typ = self.check(node.return_type) if node.return_type is not None else types.VOID
 		if specified_ret_typ != actual_ret_typ:
 			self.config.errors.add_error(ET.FUN_RETURN, node.return_type_place, f"specified return type is '{specified_ret_typ}' but function did not return")
-		self.names = vars_before
+		self.names.leave()
 		self.expected_return_type = types.VOID
 		return types.VOID
+	@dispatch.handles(nodes.Code)
 	def check_code(self, node:nodes.Code) -> Type:
-		vars_before = self.names.copy()
+		self.names.enter()
 		ret:Type = types.VOID
 		for statement in node.statements:
 			#every statement's check should return types.VOID if (and only if) there is a way, that `return` can be not executed in it
@@ -172,8 +185,9 @@ class TypeChecker:
 				ret = r
 				assert r == self.expected_return_type, f"{type(statement)} statement did not follow rules"
 				#other things are not allowed
-		self.names = vars_before #this is scoping
+		self.names.leave() #this is scoping
 		return ret
+	@dispatch.handles(nodes.Call)
 	def check_call(self, node:nodes.Call) -> Type:
 		return self.call_helper(self.check(node.func), [self.check(arg) for arg in node.args], node.place)
 	def call_helper(self, function:Type, args:list[Type], place:Place) -> Type:
@@ -197,7 +211,7 @@ class TypeChecker:
 					if len(args) != len(fun.arg_types):
 						continue#continue searching
 					for actual_arg,arg in zip(args,fun.arg_types,strict=True):
-						if actual_arg != arg:
+						if actual_arg is not arg:
 							break#break to continue
 					else:
 						return fun#found fun
@@ -209,38 +223,46 @@ class TypeChecker:
 			self.config.errors.critical_error(ET.CALL_ARGS, place, f"function '{fun}' accepts {len(fun.arg_types)} arguments, provided {len(args)} arguments")
 		for idx, typ in enumerate(args):
 			needed = fun.arg_types[idx]
-			if typ != needed:
+			if typ is not needed:#types are interned
 				self.config.errors.add_error(ET.CALL_ARG, place, f"function '{fun}' argument {idx} takes '{needed}', got '{typ}'")
 		return fun.return_type
+	@dispatch.handles(nodes.BinaryOperation)
 	def check_bin_exp(self, node:nodes.BinaryOperation) -> Type:
 		left = self.check(node.left)
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.operation.place,SemanticTokenType.OPERATOR))
 		right = self.check(node.right)
 		return node.typ(left,right, self.config)
+	@dispatch.handles(nodes.ExprStatement)
 	def check_expr_state(self, node:nodes.ExprStatement) -> Type:
 		self.check(node.value)
 		return types.VOID
+	@dispatch.handles(nodes.Str)
 	def check_str(self, node:nodes.Str) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.place,SemanticTokenType.STRING))
 		return types.STR
+	@dispatch.handles(nodes.Int)
 	def check_int(self, node:nodes.Int) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.place,SemanticTokenType.INTEGER))
 		return types.INT
+	@dispatch.handles(nodes.Short)
 	def check_short(self, node:nodes.Short) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.place,SemanticTokenType.SHORT))
 		return types.SHORT
+	@dispatch.handles(nodes.CharStr)
 	def check_char_str(self, node:nodes.CharStr) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.place,SemanticTokenType.CHARACTER_STRING))
 		return types.CHAR
+	@dispatch.handles(nodes.CharNum)
 	def check_char_num(self, node:nodes.CharNum) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.place,SemanticTokenType.CHARACTER_NUMBER))
 		return types.CHAR
+	@dispatch.handles(nodes.Assignment)
 	def check_assignment(self, node:nodes.Assignment) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.var.name.place,SemanticTokenType.VARIABLE, (SemanticTokenModifier.DEFINITION,)))
@@ -258,6 +280,7 @@ class TypeChecker:
 			elif isinstance(typ, types.Mix)       :self.semantic_tokens.add(SemanticToken(place,SemanticTokenType.MIX,            modifiers))
 			elif isinstance(typ, types.Module)    :self.semantic_tokens.add(SemanticToken(place,SemanticTokenType.MODULE,         modifiers))
 			else                                  :self.semantic_tokens.add(SemanticToken(place,SemanticTokenType.VARIABLE,       modifiers))
+	@dispatch.handles(nodes.ReferTo)
 	def check_refer(self, node:nodes.ReferTo) -> Type:
 		typ = self.names.get(node.name.operand)
 		if self.semantic:
@@ -265,6 +288,7 @@ class TypeChecker:
 		if typ is None:
 			self.config.errors.critical_error(ET.REFER, node.place, f"did not find name '{node.name}'")
 		return typ
+	@dispatch.handles(nodes.Declaration)
 	def check_declaration(self, node:nodes.Declaration) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.var.name.place,SemanticTokenType.VARIABLE, (SemanticTokenModifier.DECLARATION,)))
@@ -279,14 +303,16 @@ class TypeChecker:
 			self.config.errors.add_error(ET.DECLARATION_TIMES, node.place, f"number of elements to allocate should be an '{types.INT}', got '{times}'")
 		self.names[node.var.name.operand] = types.Ptr(types.Array(typ))
 		return types.VOID
+	@dispatch.handles(nodes.Save)
 	def check_save(self, node:nodes.Save) -> Type:
 		space = self.check(node.space)
 		value = self.check(node.value)
 		if not isinstance(space, types.Ptr):
 			self.config.errors.critical_error(ET.SAVE_PTR, node.place, f"expected pointer to save into, got '{space}'")
-		if space.pointed != value:
+		if space.pointed is not value:
 			self.config.errors.add_error(ET.SAVE, node.place, f"space type '{space}' does not match value's type '{value}'")
 		return types.VOID
+	@dispatch.handles(nodes.VariableSave)
 	def check_variable_save(self, node:nodes.VariableSave) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.space.place,SemanticTokenType.VARIABLE, (SemanticTokenModifier.DEFINITION,)))
@@ -299,9 +325,10 @@ class TypeChecker:
 			self.config.errors.add_error(ET.SIZED_VSAVE, node.place, f"type '{value}' is not sized, so it can't be saved")
 		if not isinstance(space, types.Ptr):
 			self.config.errors.critical_error(ET.VSAVE_PTR, node.place, f"expected pointer to save into, got '{space}'")
-		if space.pointed != value:
+		if space.pointed is not value:#types are interned
 			self.config.errors.add_error(ET.VSAVE, node.place, f"space type '{space}' does not match value's type '{value}'")
 		return types.VOID
+	@dispatch.handles(nodes.If)
 	def check_if(self, node:nodes.If) -> Type:
 		actual = self.check(node.condition)
 		if actual != types.BOOL:
@@ -314,38 +341,45 @@ class TypeChecker:
 		if actual_if != actual_else:
 			self.config.errors.critical_error(ET.IF_BRANCH, node.place, f"if branches are inconsistent: one branch returns while other does not (refactor without 'else')")
 		return actual_if
+	@dispatch.handles(nodes.While)
 	def check_while(self, node:nodes.While) -> Type:
 		actual = self.check(node.condition)
 		if actual != types.BOOL:
 			self.config.errors.add_error(ET.WHILE, node.place, f"while statement expected '{types.BOOL}' type, got '{actual}'")
 		return self.check(node.code)
+	@dispatch.handles(nodes.Set)
 	def check_set(self, node:nodes.Set) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.name.place,SemanticTokenType.VARIABLE, (SemanticTokenModifier.DEFINITION,)))
 		value = self.check(node.value)
 		self.names[node.name.operand] = value
 		return types.VOID
+	@dispatch.handles(nodes.UnaryExpression)
 	def check_unary_exp(self, node:nodes.UnaryExpression) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.operation.place,SemanticTokenType.OPERATOR))
 		return node.typ(self.check(node.left), self.config)
+	@dispatch.handles(nodes.Constant)
 	def check_constant(self, node:nodes.Constant) -> Type:
 		return node.typ
+	@dispatch.handles(nodes.Var)
 	def check_var(self, node:nodes.Var) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.name.place,SemanticTokenType.VARIABLE, (SemanticTokenModifier.DECLARATION,)))
 		return types.VOID
+	@dispatch.handles(nodes.Const)
 	def check_const(self, node:nodes.Const) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.name.place,SemanticTokenType.VARIABLE, (SemanticTokenModifier.DEFINITION,)))
 		return types.VOID
+	@dispatch.handles(nodes.Struct)
 	def check_struct(self, node:nodes.Struct) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.name.place,SemanticTokenType.STRUCT, (SemanticTokenModifier.DEFINITION,)))
 			for var in node.variables:
 				self.semantic_tokens.add(SemanticToken(var.name.place,SemanticTokenType.PROPERTY, (SemanticTokenModifier.DEFINITION,)))
+		self_should_be = types.Ptr(self.type_names[node.name.operand])
 		for fun in node.funs:
-			self_should_be = types.Ptr(node.to_struct(self.check))
 			if len(fun.arg_types)==0:
 				self.config.errors.critical_error(ET.STRUCT_FUN_ARGS, fun.args_place, f"bound function's argument 0 should be '{self_should_be}' (self), found 0 arguments")
 			elif self.check(fun.arg_types[0].typ) != self_should_be:
@@ -367,21 +401,25 @@ class TypeChecker:
 			if self.check(static_var.var.typ) != value:
 				self.config.errors.add_error(ET.STRUCT_STATICS, static_var.place, f"static variable '{static_var.var.name.operand}' has type '{static_var.var.typ}' but is assigned a value of type '{value}'")
 		return types.VOID
+	@dispatch.handles(nodes.Mix)
 	def check_mix(self, node:nodes.Mix) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.name.place,SemanticTokenType.FUNCTION, (SemanticTokenModifier.DEFINITION,)))
 		return types.VOID
+	@dispatch.handles(nodes.Use)
 	def check_use(self, node:nodes.Use) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.name.place,SemanticTokenType.FUNCTION, (SemanticTokenModifier.DECLARATION,)))
 			if node.as_name is not node.name:
 				self.semantic_tokens.add(SemanticToken(node.as_name.place,SemanticTokenType.FUNCTION))
 		return types.VOID
+	@dispatch.handles(nodes.Return)
 	def check_return(self, node:nodes.Return) -> Type:
 		ret = self.check(node.value)
 		if ret != self.expected_return_type:
 			self.config.errors.critical_error(ET.RETURN, node.place, f"actual return type '{ret}' does not match specified return type '{self.expected_return_type}'")
 		return ret
+	@dispatch.handles(nodes.Dot)
 	def check_dot(self, node:nodes.Dot) -> Type:
 		origin = self.check(node.origin)
 		if isinstance(origin, types.Module):
@@ -414,6 +452,7 @@ class TypeChecker:
 				fun,_ = node.lookup_enum(pointed, self.config)
 				return types.BoundFun(fun, origin, '')
 		self.config.errors.critical_error(ET.DOT, node.access.place, f"'{origin}' object doesn't have any attributes")
+	@dispatch.handles(nodes.Subscript)
 	def check_get_item(self, node:nodes.Subscript) -> Type:
 		origin = self.check(node.origin)
 		subscripts = [self.check(subscript) for subscript in node.subscripts]
@@ -443,6 +482,7 @@ class TypeChecker:
 						self.config.errors.add_error(ET.STRUCT_SUBSCRIPT, node.access_place, f"invalid subscript argument {idx} '{subscript}' for '{pointed}', expected type '{fun.arg_types[idx+1]}''")
 				return fun.return_type
 		self.config.errors.critical_error(ET.SUBSCRIPT, node.access_place, f"'{origin}' object is not subscriptable")
+	@dispatch.handles(nodes.Template)
 	def check_template(self, node:nodes.Template) -> Type:
 		for val in node.values:
 			self.check(val)
@@ -469,6 +509,7 @@ class TypeChecker:
 			assert node.formatter is not None, "DEFAULT_TEMPLATE_STRING_FORMATTER does not meet requirements to be a formatter"
 			self.config.errors.add_error(ET.TEMPLATE_ARG2, node.formatter.place, f"template formatter argument 2 (length) should be '{types.INT}', not '{formatter.arg_types[2]}'")
 		return formatter.return_type
+	@dispatch.handles(nodes.StrCast)
 	def check_string_cast(self, node:nodes.StrCast) -> Type:
 		# length should be int, pointer should be ptr(*[]char)
 		length = self.check(node.length)
@@ -478,6 +519,7 @@ class TypeChecker:
 		if pointer != types.Ptr(types.Array(types.CHAR)):
 			self.config.errors.add_error(ET.STR_CAST_PTR, node.place, f"string pointer should be '{types.Ptr(types.Array(types.CHAR))}' not '{pointer}'")
 		return types.STR
+	@dispatch.handles(nodes.Cast)
 	def check_cast(self, node:nodes.Cast) -> Type:
 		left = self.check(node.value)
 		right = self.check(node.typ)
@@ -501,16 +543,19 @@ class TypeChecker:
 		):
 			self.config.errors.critical_error(ET.CAST, node.place, f"casting type '{left}' to type '{right}' is not supported")
 		return right
+	@dispatch.handles(nodes.TypePointer)
 	def check_type_pointer(self, node:nodes.TypePointer) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.place, SemanticTokenType.TYPE))
 		pointed = self.check(node.pointed)
 		return types.Ptr(pointed)
+	@dispatch.handles(nodes.TypeArray)
 	def check_type_array(self, node:nodes.TypeArray) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.place, SemanticTokenType.TYPE))
 		element = self.check(node.typ)
 		return types.Array(element, node.size)
+	@dispatch.handles(nodes.TypeFun)
 	def check_type_fun(self, node:nodes.TypeFun) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.place, SemanticTokenType.TYPE))
@@ -519,6 +564,7 @@ class TypeChecker:
 		if node.return_type is not None:
 			return_type = self.check(node.return_type)
 		return types.Fun(args, return_type)
+	@dispatch.handles(nodes.TypeReference)
 	def check_type_reference(self, node:nodes.TypeReference) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.place, SemanticTokenType.TYPE))
@@ -535,11 +581,13 @@ class TypeChecker:
 			#assert False
 			self.config.errors.critical_error(ET.TYPE_REFERENCE, node.ref.place, f"type '{name}' is not defined")
 		return typ
+	@dispatch.handles(nodes.TypeDefinition)
 	def check_type_definition(self, node:nodes.TypeDefinition) -> Type:
 		if self.semantic:
 			self.semantic_tokens.add(SemanticToken(node.name.place, SemanticTokenType.TYPE, (SemanticTokenModifier.DEFINITION,)))
 		self.type_names[node.name.operand] = self.check(node.typ)
 		return types.VOID
+	@dispatch.handles(nodes.Match)
 	def check_match(self, node:nodes.Match) -> Type:
 		value = self.check(node.value)
 		returns:list[tuple[Type,Place]] = []
@@ -549,11 +597,11 @@ class TypeChecker:
 				for case in node.cases:
 					self.semantic_tokens.add(SemanticToken(case.name.place, SemanticTokenType.ENUM_ITEM))
 			for case in node.cases:
-				names_before = self.names.copy()
+				self.names.enter()
 				_, typ = node.lookup_enum(value, case, self.config)
 				self.names[node.match_as.operand] = typ
 				returns.append((self.check(case.body),case.place))
-				self.names = names_before
+				self.names.leave()
 			if node.default is not None:
 				returns.append((self.check(node.default),node.default.place))
 		else:
@@ -568,44 +616,4 @@ class TypeChecker:
 			return types.VOID
 		return right_ret
 	def check(self, node:Node) -> Type:
-		if type(node) == nodes.Assignment       : return self.check_assignment     (node)
-		if type(node) == nodes.BinaryOperation  : return self.check_bin_exp        (node)
-		if type(node) == nodes.Call             : return self.check_call           (node)
-		if type(node) == nodes.Cast             : return self.check_cast           (node)
-		if type(node) == nodes.CharNum          : return self.check_char_num       (node)
-		if type(node) == nodes.CharStr          : return self.check_char_str       (node)
-		if type(node) == nodes.Code             : return self.check_code           (node)
-		if type(node) == nodes.Const            : return self.check_const          (node)
-		if type(node) == nodes.Constant         : return self.check_constant       (node)
-		if type(node) == nodes.Declaration      : return self.check_declaration    (node)
-		if type(node) == nodes.Dot              : return self.check_dot            (node)
-		if type(node) == nodes.Enum             : return self.check_enum           (node)
-		if type(node) == nodes.ExprStatement    : return self.check_expr_state     (node)
-		if type(node) == nodes.FromImport       : return self.check_from_import    (node)
-		if type(node) == nodes.Fun              : return self.check_fun            (node)
-		if type(node) == nodes.If               : return self.check_if             (node)
-		if type(node) == nodes.Import           : return self.check_import         (node)
-		if type(node) == nodes.Int              : return self.check_int            (node)
-		if type(node) == nodes.Match            : return self.check_match          (node)
-		if type(node) == nodes.Mix              : return self.check_mix            (node)
-		if type(node) == nodes.ReferTo          : return self.check_refer          (node)
-		if type(node) == nodes.Return           : return self.check_return         (node)
-		if type(node) == nodes.Save             : return self.check_save           (node)
-		if type(node) == nodes.Set              : return self.check_set            (node)
-		if type(node) == nodes.Short            : return self.check_short          (node)
-		if type(node) == nodes.Str              : return self.check_str            (node)
-		if type(node) == nodes.StrCast          : return self.check_string_cast    (node)
-		if type(node) == nodes.Struct           : return self.check_struct         (node)
-		if type(node) == nodes.Subscript        : return self.check_get_item       (node)
-		if type(node) == nodes.Template         : return self.check_template       (node)
-		if type(node) == nodes.TypeArray        : return self.check_type_array     (node)
-		if type(node) == nodes.TypeDefinition   : return self.check_type_definition(node)
-		if type(node) == nodes.TypeFun          : return self.check_type_fun       (node)
-		if type(node) == nodes.TypePointer      : return self.check_type_pointer   (node)
-		if type(node) == nodes.TypeReference    : return self.check_type_reference (node)
-		if type(node) == nodes.UnaryExpression  : return self.check_unary_exp      (node)
-		if type(node) == nodes.Use              : return self.check_use            (node)
-		if type(node) == nodes.Var              : return self.check_var            (node)
-		if type(node) == nodes.VariableSave     : return self.check_variable_save  (node)
-		if type(node) == nodes.While            : return self.check_while          (node)
-		assert False, f"Unreachable, unknown {type(node)=}"
+		return self.dispatch.handler(node)(self, node)
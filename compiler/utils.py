@@ -1,5 +1,11 @@
+from dataclasses import fields
+from functools import cache
+import hashlib
+import io
 import os
-from .primitives import nodes, Config, extract_file_text_from_file_path, Place, MAIN_MODULE_PATH, ET
+import pickle
+from typing import Any, Iterable
+from .primitives import nodes, Node, Token, Config, extract_file_text_from_file_path, Place, MAIN_MODULE_PATH, ET, JARARACA_PATH, CACHE_PATH
 from . import lexer
 from . import parser
 __all__ = [
@@ -16,7 +22,133 @@ def dump_module(module:nodes.Module, config:Config) -> None:
 	config.errors.exit_properly(0)
 
 
+field_names:dict[type, tuple[str, ...]] = {}#node class -> its fields, but uid
+def node_fields(cls:type) -> tuple[str, ...]:
+	names = field_names.get(cls)
+	if names is None:
+		names = field_names[cls] = tuple(f.name for f in fields(cls) if f.name != 'uid')
+	return names
+@cache
+def compiler_hash() -> bytes:
+	"""hash of everything, that affects parsing: the compiler itself and where packets point to"""
+	hash = hashlib.sha256()
+	for directory in (os.path.dirname(__file__), os.path.join(os.path.dirname(__file__), 'primitives'), os.path.join(JARARACA_PATH, 'packets')):
+		for name in sorted(os.listdir(directory)):
+			if name.endswith(('.py', '.link')):
+				hash.update(name.encode())
+				with open(os.path.join(directory, name), 'rb') as file:
+					hash.update(file.read())
+	return hash.digest()
+class ModulePickler(pickle.Pickler):
+	"""imported modules are saved as references to their own cache entries, nodes are saved without uids"""
+	def __init__(self, file:io.BytesIO, module:nodes.Module) -> None:
+		super().__init__(file, pickle.HIGHEST_PROTOCOL)
+		self.module = module
+		self.imports:dict[str, str] = {}
+	def persistent_id(self, obj:Any) -> Any:
+		if isinstance(obj, nodes.Module) and obj is not self.module:
+			self.imports[obj.path] = module_files[obj.path]
+			return obj.path, module_files[obj.path]
+		return None
+	def reducer_override(self, obj:Any) -> Any:
+		if isinstance(obj, (Node, nodes.Module)):#uids are unique only for one run, new ones are given on load
+			return type(obj), tuple(getattr(obj, name) for name in node_fields(type(obj)))
+		return NotImplemented
+class ModuleUnpickler(pickle.Unpickler):
+	def __init__(self, file:io.BufferedReader, config:Config) -> None:
+		super().__init__(file)
+		self.config = config
+	def persistent_load(self, pid:Any) -> nodes.Module:
+		module_path, file_path = pid
+		module = extract_module_from_file_path(file_path, self.config, module_path)
+		if module is None:
+			raise pickle.UnpicklingError(f"imported module '{module_path}' was not extracted")
+		return module
+def cached_module_path(file_path:str, module_path:str, text:str) -> str:
+	hash = hashlib.sha256(compiler_hash())
+	hash.update(f"{module_path}\0{os.path.abspath(file_path)}\0{text}".encode())
+	return os.path.join(CACHE_PATH, 'ast', hash.hexdigest()+'.pickle')
+def cache_header() -> bytes:
+	"""start of every cache entry, entries of other compilers are not unpickled"""
+	return b'jararaca ast\0' + compiler_hash()
+def load_cached_module(path:str, config:Config) -> 'nodes.Module|None':
+	try:
+		with open(path, 'rb') as file:
+			stat = os.fstat(file.fileno())
+			if stat.st_uid != os.getuid() or stat.st_mode & 0o022:#only entries, that no one else could have written, are unpickled
+				return None
+			header = cache_header()
+			if file.read(len(header)) != header:
+				return None
+			imports:dict[str, str] = pickle.load(file)
+			if not all(os.path.exists(file_path) for file_path in imports.values()):
+				return None
+			module:nodes.Module = ModuleUnpickler(file, config).load()
+			return module
+	except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):#missing or broken entry is just a miss
+		return None
+def save_cached_module(path:str, module:nodes.Module) -> None:
+	data = io.BytesIO()
+	pickler = ModulePickler(data, module)
+	try:
+		pickler.dump(module)
+		os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+		temporary = f"{path}.{os.getpid()}.tmp"
+		with os.fdopen(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as file:
+			file.write(cache_header())
+			pickle.dump(pickler.imports, file, pickle.HIGHEST_PROTOCOL)
+			file.write(data.getbuffer())
+		os.replace(temporary, path)#readers never see a half written entry
+	except (OSError, RecursionError, pickle.PicklingError):
+		pass
+
+def imported_modules(module:nodes.Module, found:'dict[str, nodes.Module]|None' = None) -> 'dict[str, nodes.Module]':
+	"""every module, that `module` imports, directly or not"""
+	if found is None:
+		found = {}
+	imports = [top.module for top in module.tops if isinstance(top, (nodes.Import, nodes.FromImport))]
+	if module.builtin_module is not None:
+		imports.append(module.builtin_module)
+	for imported in imports:
+		if imported.path not in found:
+			found[imported.path] = imported
+			imported_modules(imported, found)
+	return found
+def fun_signature(fun:nodes.Fun) -> str:
+	return f"fun {fun.name}({', '.join(str(arg) for arg in fun.arg_types)}) -> {fun.return_type}"
+def module_interface(module:nodes.Module) -> str:
+	"""what modules, that import `module`, are compiled against: everything, but bodies of functions"""
+	lines = []
+	for top in module.tops:
+		if isinstance(top, nodes.Fun):
+			lines.append(fun_signature(top))
+		elif isinstance(top, nodes.Struct):
+			lines.append(f"struct {top.name} {' '.join(map(str, top.variables))} {' '.join(map(str, top.static_variables))} {' '.join(map(fun_signature, top.funs))}")
+		elif isinstance(top, nodes.Enum):
+			lines.append(f"enum {top.name} {' '.join(map(str, top.typed_items))} {' '.join(map(str, top.items))} {' '.join(map(fun_signature, top.funs))}")
+		else:
+			lines.append(str(top))
+	return '\n'.join(lines)
+def count_nodes(node:'Node|nodes.Module') -> int:
+	"""nodes in the tree of `node`, imported modules are not counted"""
+	count = 1 if isinstance(node, Node) else 0
+	for name in node_fields(type(node)):
+		value = getattr(node, name)
+		for item in value if isinstance(value, tuple) else (value,):
+			if isinstance(item, Node):
+				count += count_nodes(item)
+	return count
+def object_key(module:nodes.Module) -> str:
+	"""changes, when the object of `module` has to be rebuilt: the module itself or an interface of anything it imports changed"""
+	hash = hashlib.sha256(compiler_hash())
+	hash.update(source_hashes[module.path])
+	for path, imported in sorted(imported_modules(module).items()):
+		hash.update(f"\0{path}\0{module_interface(imported)}".encode())
+	return hash.hexdigest()
+
 parsed_modules:dict[str, nodes.Module] = {}
+module_files:dict[str, str] = {}#module path -> file path of parsed modules
+source_hashes:dict[str, bytes] = {}#module path -> hash of its file path and text, kept after parsing for `object_key`
 import_stack:list[str] = []
 def extract_module_from_file_path(file_path:str, config:Config, module_path:str|None = None, place:'Place|None' = None) -> 'nodes.Module|None':
 	if module_path in parsed_modules:
@@ -32,9 +164,32 @@ def extract_module_from_file_path(file_path:str, config:Config, module_path:str|
 		config.errors.show_errors()
 		print(f"INFO: Extracting module '{module_path}' from file '{file_path}'")
 	text = extract_file_text_from_file_path(file_path)
-	tokens = lexer.lex(text, config, file_path)
-	module:nodes.Module = parser.Parser(tokens, config, module_path).parse()
+	source_hashes[module_path] = hashlib.sha256(f"{os.path.abspath(file_path)}\0{text}".encode()).digest()
+	cached_path = cached_module_path(file_path, module_path, text) if config.cache else None
+	module = None
+	if cached_path is not None:
+		with config.passes.measure('load cached', module_path):
+			module = load_cached_module(cached_path, config)
+	if module is None:
+		errors = len(config.errors.errors)
+		if config.passes.enabled:#lexed before parsing, so both are measured on their own
+			with config.passes.measure('lex', module_path):
+				lexed:list[Token] = lexer.lex(text, config, file_path)
+			config.passes.count(module_path, 'tokens', len(lexed))
+			tokens:Iterable[Token] = lexed
+		else:
+			tokens = lexer.stream(text, config, file_path)
+		with config.passes.measure('parse', module_path):
+			module = parser.Parser(tokens, config, module_path).parse()
+		if cached_path is not None and len(config.errors.errors) == errors:
+			with config.passes.measure('save cached', module_path):
+				save_cached_module(cached_path, module)
+	elif config.verbose:
+		print(f"INFO: Module '{module_path}' is loaded from cache '{cached_path}'")
+	if config.passes.enabled:
+		config.passes.count(module_path, 'nodes', count_nodes(module))
 	parsed_modules[module_path] = module
+	module_files[module_path] = file_path
 	m = import_stack.pop()
 	assert m is module_path, "something gone wrong"
 	if config.verbose:
@@ -42,6 +197,7 @@ def extract_module_from_file_path(file_path:str, config:Config, module_path:str|
 		print(f"INFO: Module '{module_path}' is converted to {len(module.tops)} tops")
 	if module_path == MAIN_MODULE_PATH:
 		parsed_modules.clear()
+		module_files.clear()
 		assert len(import_stack) == 0, "import stack was not decreased"
 	return module
 